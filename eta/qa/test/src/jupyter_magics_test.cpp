@@ -31,6 +31,14 @@ BOOST_AUTO_TEST_CASE(parse_cell_magic_trace_with_body) {
     BOOST_TEST(parsed.body == "(+ 1 2)\n(* 3 4)\n");
 }
 
+BOOST_AUTO_TEST_CASE(parse_line_magic_reset_without_args) {
+    const auto parsed = eta::jupyter::parse_magic("%reset");
+    BOOST_TEST(static_cast<int>(parsed.kind) == static_cast<int>(eta::jupyter::MagicKind::Line));
+    BOOST_TEST(static_cast<int>(parsed.name) == static_cast<int>(eta::jupyter::MagicName::Reset));
+    BOOST_TEST(parsed.args.empty());
+    BOOST_TEST(eta::jupyter::magic_name(parsed.name) == "reset");
+}
+
 BOOST_AUTO_TEST_CASE(parse_non_magic_returns_none) {
     const auto parsed = eta::jupyter::parse_magic("(+ 1 2)");
     BOOST_TEST(static_cast<int>(parsed.kind) == static_cast<int>(eta::jupyter::MagicKind::None));
@@ -222,6 +222,7 @@ EtaInterpreter::EtaInterpreter() {
 }
 
 void EtaInterpreter::request_interrupt() noexcept {
+    std::lock_guard<std::mutex> lk(interrupt_mu_);
     if (driver_) {
         driver_->request_interrupt();
     }
@@ -618,6 +619,12 @@ void EtaInterpreter::execute_request_impl(send_reply_callback cb,
                 emit_trace_widget = true;
                 break;
             }
+            case eta::jupyter::MagicName::Reset: {
+                restore_ports();
+                reset_session();
+                cb(xeus::create_successful_reply());
+                return;
+            }
             case eta::jupyter::MagicName::Unknown:
             default:
                 restore_ports();
@@ -908,6 +915,10 @@ void EtaInterpreter::apply_startup_configuration() {
     if (!driver_) return;
 
     std::lock_guard<std::mutex> lk(driver_mu_);
+    run_autoimports();
+}
+
+void EtaInterpreter::run_autoimports() {
     auto is_safe_module_name = [](const std::string& module) {
         if (module.empty()) return false;
         return std::all_of(module.begin(), module.end(), [](unsigned char c) {
@@ -930,6 +941,22 @@ void EtaInterpreter::apply_startup_configuration() {
     }
 }
 
+void EtaInterpreter::reset_session() {
+    auto fresh = std::make_unique<eta::session::Driver>(driver_->resolver());
+    (void)fresh->load_prelude();
+    if (comm_targets_registered_) {
+        fresh->on_actor_lifecycle([this](const eta::session::Driver::ActorEvent& event) {
+            handle_actor_lifecycle_event(event);
+        });
+    }
+    {
+        std::lock_guard<std::mutex> lk(interrupt_mu_);
+        driver_.swap(fresh);
+    }
+    fresh.reset();  // destroy the old driver outside interrupt_mu_
+    run_autoimports();
+}
+
 void EtaInterpreter::set_kernel_environment() {
 #if defined(_WIN32)
     _putenv_s("ETA_KERNEL", "1");
@@ -24,6 +24,8 @@ public:
 
     /**
      * @brief Request interruption of the currently executing cell.
+     *
+     * Safe to call from any thread, including while `%reset` swaps the driver.
      */
     void request_interrupt() noexcept;
 
@@ -91,6 +93,23 @@ private:
      */
     void apply_startup_configuration();
 
+    /**
+     * @brief Import the configured auto-import modules into the current driver.
+     *
+     * Caller must hold `driver_mu_`.
+     */
+    void run_autoimports();
+
+    /**
+     * @brief Replace the driver with a fresh one (prelude + auto-imports).
+     *
+     * Backs the `%reset` magic: drops all user globals and loaded modules
+     * without restarting the kernel process.  The new driver is fully built
+     * before it replaces the old one, so a throw leaves the session intact.
+     * Caller must hold `driver_mu_` and `driver_` must be initialised.
+     */
+    void reset_session();
+
     /**
      * @brief Set process-level environment markers for kernel mode.
      */
@@ -145,6 +164,9 @@ private:
 
     std::unique_ptr<eta::session::Driver> driver_;
     mutable std::mutex driver_mu_;
+    /// Guards replacing `driver_` against `request_interrupt()`, which cannot
+    /// take `driver_mu_` because a running cell holds it.
+    mutable std::mutex interrupt_mu_;
     mutable std::mutex comm_mu_;
     std::unordered_map<std::string,
                        std::unordered_map<std::string, std::unique_ptr<xeus::xcomm>>> comms_;
@@ -35,6 +35,7 @@ namespace {
     if (name == "plot") return MagicName::Plot;
     if (name == "table") return MagicName::Table;
     if (name == "trace") return MagicName::Trace;
+    if (name == "reset") return MagicName::Reset;
     return MagicName::Unknown;
 }
 
@@ -126,6 +127,7 @@ std::string_view magic_name(MagicName name)
         case MagicName::Plot: return "plot";
         case MagicName::Table: return "table";
         case MagicName::Trace: return "trace";
+        case MagicName::Reset: return "reset";
         case MagicName::Unknown:
         default:
             return "unknown";
@@ -33,6 +33,7 @@ enum class MagicName {
     Plot,
     Table,
     Trace,
+    Reset,
 };
 
 /**
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Benchmark the Python build tooling against a checked-in baseline.
+
+Everything runs on synthetic inputs, so no build tree or real etac is needed:
+
+  embed_blob        format_bytes() on random blobs from 1 KiB to 64 MiB
+  build_stdlib      compile_source() driving fake_etac.py (spawn, retry path)
+                    and mirror_sources() on a generated module tree
+  mojibake          the repair engines and the byte-level auditor on a
+                    generated docs-like corpus
+
+Each case records throughput and peak traced memory (tracemalloc, measured
+in a separate untimed run).  Case names carry their input size, so --quick
+runs are only ever compared with --quick baselines.
+
+Throughput is not compared in absolute terms: every run also times a fixed
+pure-Python reference workload, the baseline stores each case's throughput
+relative to the reference measured in the same run, and a new run is held
+to that ratio.  That cancels out most of the difference between machines
+(the last recording machine is noted under "_meta" in baseline.json), but
+not differences in disk or process-spawn speed, which the build_stdlib
+cases are sensitive to.  With --gate the exit status is 1 if any case
+regressed past --tolerance.
+
+Usage:
+    python scripts/bench/bench_build_tools.py
+    python scripts/bench/bench_build_tools.py --quick --only mojibake
+    python scripts/bench/bench_build_tools.py --gate --tolerance 0.3
+    python scripts/bench/bench_build_tools.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent
+sys.path[:0] = [str(SCRIPTS_DIR), str(SCRIPTS_DIR / "clion_mojibake_fixes")]
+
+import build_stdlib_etac  # noqa: E402
+import check_encoding  # noqa: E402
+import embed_blob  # noqa: E402
+from mojibake_engine import DOCS_ENGINE, FFFD, FIXES, FIXES_ENGINE  # noqa: E402
+
+BASELINE = BENCH_DIR / "baseline.json"
+FAKE_ETAC = BENCH_DIR / "fake_etac.py"
+
+KIB = 1 << 10
+MIB = 1 << 20
+BLOB_SIZES = (KIB, 64 * KIB, MIB, 8 * MIB, 64 * MIB)
+QUICK_MAX_BLOB = MIB
+# Blobs larger than this are timed once; the formatter is linear anyway.
+REPEAT_MAX_BLOB = MIB
+
+REFERENCE = "reference.python_loop"
+REFERENCE_ITERATIONS = 500_000
+REFERENCE_REPEAT = 5
+
+STDLIB_MODULES = 64
+QUICK_STDLIB_MODULES = 16
+CORPUS_BYTES = 4 * MIB
+QUICK_CORPUS_BYTES = 512 * KIB
+
+
+class Result(NamedTuple):
+    name: str
+    throughput: float   # `unit` per second
+    unit: str
+    seconds: float      # best wall time of one run
+    peak_mb: float      # peak traced Python allocations, MiB
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    work: float         # units processed by one run
+    unit: str
+    repeat: int
+
+
+def measure(case: Case, memory: bool) -> Result:
+    best = float("inf")
+    for _ in range(max(1, case.repeat)):
+        start = time.perf_counter()
+        case.run()
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = 0.0
+    if memory:
+        tracemalloc.start()
+        try:
+            case.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / MIB
+
+    return Result(case.name, case.work / best if best else float("inf"), case.unit, best, peak_mb)
+
+
+# ── Reference workload ────────────────────────────────────────────────────────
+
+def reference_case(args: argparse.Namespace) -> Case:
+    """Fixed interpreter-bound work used to normalise throughput across machines."""
+    def run() -> int:
+        acc = 0
+        for i in range(REFERENCE_ITERATIONS):
+            acc += len(f"{i:#x},")
+        return acc
+
+    return Case(REFERENCE, run, REFERENCE_ITERATIONS / 1e6, "Mops/s",
+                max(REFERENCE_REPEAT, args.repeat))
+
+
+# ── embed_blob ────────────────────────────────────────────────────────────────
+
+def _size_label(size: int) -> str:
+    return f"{size // MIB}MiB" if size >= MIB else f"{size // KIB}KiB"
+
+
+def embed_blob_cases(args: argparse.Namespace) -> list[Case]:
+    rng = random.Random(0xE7A)
+    cases = []
+    for size in BLOB_SIZES:
+        if args.quick and size > QUICK_MAX_BLOB:
+            continue
+        data = rng.randbytes(size)
+        cases.append(Case(
+            f"embed_blob.format_bytes/{_size_label(size)}",
+            lambda data=data: embed_blob.format_bytes(data),
+            size / MIB, "MB/s",
+            args.repeat if size <= REPEAT_MAX_BLOB else 1,
+        ))
+    return cases
+
+
+# ── build_stdlib_etac ─────────────────────────────────────────────────────────
+
+def write_fake_etac(directory: Path) -> Path:
+    """Write a launcher for fake_etac.py that compile_source() can exec."""
+    if os.name == "nt":
+        launcher = directory / "fake-etac.cmd"
+        launcher.write_text(f'@"{sys.executable}" "{FAKE_ETAC}" %*\r\n', encoding="utf-8")
+    else:
+        launcher = directory / "fake-etac"
+        launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_ETAC}" "$@"\n',
+                            encoding="utf-8")
+        launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return launcher
+
+
+def generate_stdlib(src_root: Path, modules: int, seed: int = 7) -> list[Path]:
+    """Create a stdlib-shaped tree of small .eta modules under ``src_root``."""
+    rng = random.Random(seed)
+    sources = []
+    for idx in range(modules):
+        package = src_root / "std" / f"pkg{idx % 8}"
+        package.mkdir(parents=True, exist_ok=True)
+        source = package / f"mod{idx}.eta"
+        body = "\n".join(
+            f"  (defun f{n} (x) (+ x {rng.randint(0, 1000)}))" for n in range(rng.randint(10, 60))
+        )
+        source.write_text(f"(module std.pkg{idx % 8}.mod{idx}\n{body})\n", encoding="utf-8")
+        sources.append(source)
+    return sorted(sources)
+
+
+def build_stdlib_cases(args: argparse.Namespace, workdir: Path) -> list[Case]:
+    modules = QUICK_STDLIB_MODULES if args.quick else STDLIB_MODULES
+    etac = write_fake_etac(workdir)
+    src_root = workdir / "stdlib-src"
+    sources = generate_stdlib(src_root, modules)
+    out_root = workdir / "stdlib-out"
+
+    def compile_all(fail_no_prelude: bool) -> None:
+        os.environ["ETA_FAKE_ETAC_FAIL_NO_PRELUDE"] = "1" if fail_no_prelude else "0"
+        try:
+            for source in sources:
+                build_stdlib_etac.compile_source(etac, src_root, source, out_root)
+        finally:
+            os.environ.pop("ETA_FAKE_ETAC_FAIL_NO_PRELUDE", None)
+
+    def mirror() -> None:
+        build_stdlib_etac.remove_stale_artifacts(out_root)
+        build_stdlib_etac.mirror_sources(sources, src_root, out_root)
+
+    return [
+        Case(f"build_stdlib.compile_source/first-try/{modules}mod", lambda: compile_all(False),
+             modules, "modules/s", args.repeat),
+        Case(f"build_stdlib.compile_source/retry/{modules}mod", lambda: compile_all(True),
+             modules, "modules/s", args.repeat),
+        Case(f"build_stdlib.mirror_sources/{modules}mod", mirror, modules, "files/s", args.repeat),
+    ]
+
+
+# ── mojibake ──────────────────────────────────────────────────────────────────
+
+def generate_corpus(size: int, seed: int = 11) -> str:
+    """Docs-like markdown: mostly ASCII, some real Unicode, some mojibake and FFFD."""
+    rng = random.Random(seed)
+    words = ["eta", "module", "closure", "tensor", "std.net", "bytecode", "`(define x 1)`",
+             "stdlib", "compile", "runtime", "→", "—", "é", "λ"]
+    bad = sorted(FIXES)
+    lines: list[str] = []
+    total = 0
+    while total < size:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(4, 16)))
+        roll = rng.random()
+        if roll < 0.05:
+            line += " " + rng.choice(bad) + " " + rng.choice(words)
+        elif roll < 0.07:
+            line = f"| `sig` {FFFD} {line} |"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def mojibake_cases(args: argparse.Namespace) -> list[Case]:
+    size = QUICK_CORPUS_BYTES if args.quick else CORPUS_BYTES
+    text = generate_corpus(size)
+    data = text.encode("utf-8")
+    mb = len(data) / MIB
+    label = _size_label(size)
+    return [
+        Case(f"mojibake.repair/fixes/{label}", lambda: FIXES_ENGINE.repair(text),
+             mb, "MB/s", args.repeat),
+        Case(f"mojibake.repair/docs+fffd/{label}", lambda: DOCS_ENGINE.repair(text),
+             mb, "MB/s", args.repeat),
+        Case(f"mojibake.audit_bytes/{label}", lambda: check_encoding.audit_bytes("corpus.md", data),
+             mb, "MB/s", args.repeat),
+    ]
+
+
+SUITES = ("embed_blob", "build_stdlib", "mojibake")
+
+
+# ── Baseline comparison ───────────────────────────────────────────────────────
+
+def reference_throughput(results: list[Result]) -> float | None:
+    return next((r.throughput for r in results if r.name == REFERENCE), None)
+
+
+def compare(results: list[Result], baseline: dict, tolerance: float) -> list[tuple[Result, str]]:
+    """Label each result ok / REGRESSED / new against ``baseline``."""
+    reference = reference_throughput(results)
+    rows = []
+    for r in results:
+        base = baseline.get(r.name)
+        if r.name == REFERENCE:
+            then = base and base.get("throughput")
+            rows.append((r, f"reference ({r.throughput / then:.2f}x baseline machine)"
+                            if then else "reference"))
+            continue
+        if base is None:
+            rows.append((r, "new"))
+            continue
+        notes = []
+        if reference and "relative" in base:
+            expected = base["relative"] * reference
+        else:
+            expected = base["throughput"]
+        if r.throughput < expected * (1 - tolerance):
+            notes.append(f"throughput {r.throughput / expected:.0%} of baseline")
+        # Small allocations are noisy; ignore drift under 1 MiB.
+        if base.get("peak_mb") and r.peak_mb > base["peak_mb"] * (1 + tolerance) + 1:
+            notes.append(f"peak {r.peak_mb / base['peak_mb']:.0%} of baseline")
+        rows.append((r, "REGRESSED: " + "; ".join(notes) if notes else "ok"))
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", action="append", choices=SUITES,
+                    help="run only this suite (repeatable)")
+    ap.add_argument("--quick", action="store_true",
+                    help=f"smaller inputs (blobs up to {_size_label(QUICK_MAX_BLOB)})")
+    ap.add_argument("--repeat", type=int, default=3,
+                    help="timed runs per case; the best is kept (default: 3)")
+    ap.add_argument("--no-memory", action="store_true",
+                    help="skip the tracemalloc peak-memory run")
+    ap.add_argument("--baseline", default=str(BASELINE),
+                    help="baseline JSON (default: scripts/bench/baseline.json)")
+    ap.add_argument("--tolerance", type=float, default=0.3,
+                    help="allowed fractional slowdown / memory growth (default: 0.3)")
+    ap.add_argument("--gate", action="store_true",
+                    help="exit 1 if any case regressed against the baseline")
+    ap.add_argument("--update-baseline", action="store_true",
+                    help="write this run's results into the baseline file")
+    ap.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = ap.parse_args()
+
+    suites = args.only or list(SUITES)
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.is_file() else {}
+
+    results: list[Result] = []
+    with tempfile.TemporaryDirectory(prefix="eta-bench-") as tmp:
+        workdir = Path(tmp)
+        reference = reference_case(args)
+        cases: list[Case] = [reference]
+        if "embed_blob" in suites:
+            cases += embed_blob_cases(args)
+        if "build_stdlib" in suites:
+            cases += build_stdlib_cases(args, workdir)
+        if "mojibake" in suites:
+            cases += mojibake_cases(args)
+        for case in cases:
+            results.append(measure(case, memory=not args.no_memory))
+            print(f"  {case.name}: done", file=sys.stderr)
+        # Time the reference again at the end and keep the faster run, so a
+        # slow start (frequency scaling, a busy neighbour) does not skew it.
+        again = measure(reference, memory=False)
+        if again.throughput > results[0].throughput:
+            results[0] = again._replace(peak_mb=results[0].peak_mb)
+
+    rows = compare(results, baseline, args.tolerance)
+    width = max(len(r.name) for r, _ in rows)
+    print(f"{'case':<{width}}  {'throughput':>16}  {'best s':>8}  {'peak MiB':>8}  status")
+    print("-" * (width + 50))
+    for r, status in rows:
+        print(f"{r.name:<{width}}  {r.throughput:>10.1f} {r.unit:<5}  {r.seconds:>8.4f}  "
+              f"{r.peak_mb:>8.1f}  {status}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps([r._asdict() for r in results], indent=2) + "\n",
+                                   encoding="utf-8")
+
+    if args.update_baseline:
+        for r in results:
+            entry = {"throughput": round(r.throughput, 3), "unit": r.unit}
+            if r.name != REFERENCE:
+                entry["relative"] = round(r.throughput / reference_throughput(results), 6)
+            if not args.no_memory:
+                entry["peak_mb"] = round(r.peak_mb, 3)
+            elif r.name in baseline and "peak_mb" in baseline[r.name]:
+                entry["peak_mb"] = baseline[r.name]["peak_mb"]
+            baseline[r.name] = entry
+        baseline["_meta"] = {
+            "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(),
+            "system": platform.system(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        }
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n",
+                                 encoding="utf-8")
+        print(f"\nupdated {baseline_path}")
+
+    regressed = [r for r, status in rows if status.startswith("REGRESSED")]
+    if regressed:
+        print(f"\n{len(regressed)} case(s) regressed beyond {args.tolerance:.0%}.")
+    return 1 if args.gate and regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""End-to-end check of build_stdlib_etac.py --workers against a local build.
+
+Starts two etac_worker.py processes on 127.0.0.1:0 that compile with
+fake_etac.py (ETA_FAKE_ETAC_REQUIRE_IMPORTS=1, so a module shipped without
+the artifacts of its imports fails), runs a distributed build of the
+stdlib, kills one worker once the first artifacts appear, and then compares
+the resulting tree with a plain local build, file by file.
+
+Exit status is 0 if the distributed build succeeded and matched, 1 otherwise.
+
+Usage:
+    python scripts/bench/check_distributed_build.py
+    python scripts/bench/check_distributed_build.py --src-root stdlib --delay 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent
+REPO_ROOT = SCRIPTS_DIR.parent
+sys.path[:0] = [str(SCRIPTS_DIR), str(BENCH_DIR)]
+
+from bench_build_tools import write_fake_etac  # noqa: E402
+
+BUILD_SCRIPT = SCRIPTS_DIR / "build_stdlib_etac.py"
+WORKER_SCRIPT = SCRIPTS_DIR / "etac_worker.py"
+LISTENING = re.compile(r"listening on (\S+:\d+)")
+BUILD_TIMEOUT = 600.0
+
+
+def start_worker(etac: Path, env: dict[str, str]) -> tuple[subprocess.Popen, str]:
+    """Launch one worker on a free port and return it with its endpoint."""
+    proc = subprocess.Popen(
+        [sys.executable, str(WORKER_SCRIPT), "--etac", str(etac),
+         "--listen", "127.0.0.1:0", "--jobs", "2"],
+        stdout=subprocess.PIPE, text=True, env=env,
+    )
+    line = proc.stdout.readline() if proc.stdout else ""
+    match = LISTENING.search(line)
+    if not match:
+        proc.kill()
+        raise RuntimeError(f"worker did not start (got {line.strip()!r})")
+    return proc, match.group(1)
+
+
+def run_build(etac: Path, src_root: Path, out_root: Path, env: dict[str, str],
+              workers: list[str] | None = None) -> subprocess.Popen:
+    cmd = [sys.executable, str(BUILD_SCRIPT), "--etac", str(etac),
+           "--src-root", str(src_root), "--out-root", str(out_root)]
+    if workers:
+        cmd += ["--workers", ",".join(workers)]
+    return subprocess.Popen(cmd, env=env)
+
+
+def wait_for_artifact(out_root: Path, build: subprocess.Popen) -> bool:
+    """Block until the build has written its first .etac; False if it exited first."""
+    deadline = time.monotonic() + BUILD_TIMEOUT
+    while time.monotonic() < deadline:
+        if build.poll() is not None:
+            return False
+        if out_root.is_dir() and next(out_root.rglob("*.etac"), None) is not None:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def compare_trees(expected: Path, actual: Path) -> list[str]:
+    """Relative paths that are missing, extra or different in ``actual``."""
+    def files(root: Path) -> set[str]:
+        return {p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file()}
+
+    want, got = files(expected), files(actual)
+    problems = [f"missing {rel}" for rel in sorted(want - got)]
+    problems += [f"unexpected {rel}" for rel in sorted(got - want)]
+    problems += [f"differs {rel}" for rel in sorted(want & got)
+                 if (expected / rel).read_bytes() != (actual / rel).read_bytes()]
+    return problems
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src-root", default=str(REPO_ROOT / "stdlib"),
+                        help="Stdlib source root to build (default: the repo's stdlib)")
+    parser.add_argument("--delay", type=float, default=0.05,
+                        help="Seconds fake_etac sleeps per compile, so the kill lands "
+                             "mid-build (default: 0.05)")
+    parser.add_argument("--keep-temp", action="store_true",
+                        help="Keep the temporary build trees for inspection")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    src_root = Path(args.src_root).resolve()
+    if not src_root.is_dir():
+        print(f"error: stdlib source root not found: {src_root}", file=sys.stderr)
+        return 1
+
+    # The local build resolves imports from sources, like the real etac;
+    # only the workers insist on the shipped dependency artifacts.
+    env = dict(os.environ)
+    worker_env = dict(env, ETA_FAKE_ETAC_REQUIRE_IMPORTS="1",
+                      ETA_FAKE_ETAC_DELAY=str(args.delay))
+    workdir = Path(tempfile.mkdtemp(prefix="etac-distributed-"))
+    workers: list[subprocess.Popen] = []
+    try:
+        etac = write_fake_etac(workdir)
+        local_root = workdir / "local"
+        distributed_root = workdir / "distributed"
+
+        local = run_build(etac, src_root, local_root, env)
+        if local.wait(timeout=BUILD_TIMEOUT) != 0:
+            print("FAIL: local build failed", file=sys.stderr)
+            return 1
+
+        endpoints = []
+        for _ in range(2):
+            proc, endpoint = start_worker(etac, worker_env)
+            workers.append(proc)
+            endpoints.append(endpoint)
+        print(f"workers: {', '.join(endpoints)}")
+
+        build = run_build(etac, src_root, distributed_root, env, endpoints)
+        if not wait_for_artifact(distributed_root, build):
+            build.wait(timeout=BUILD_TIMEOUT)
+            print("FAIL: build finished before a worker could be killed; raise --delay",
+                  file=sys.stderr)
+            return 1
+        workers[1].kill()
+        workers[1].wait()
+        print(f"killed worker {endpoints[1]} mid-build")
+        if build.wait(timeout=BUILD_TIMEOUT) != 0:
+            print("FAIL: distributed build failed", file=sys.stderr)
+            return 1
+
+        problems = compare_trees(local_root, distributed_root)
+        for problem in problems:
+            print(f"  {problem}", file=sys.stderr)
+        if problems:
+            print(f"FAIL: {len(problems)} file(s) differ from the local build", file=sys.stderr)
+            return 1
+        print("OK: distributed build matches the local build")
+        return 0
+    finally:
+        for proc in workers:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        if args.keep_temp:
+            print(f"kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
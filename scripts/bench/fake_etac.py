@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Stand-in for the etac CLI, used to benchmark and test the build drivers.
+
+Accepts the same arguments build_stdlib_etac.py passes to etac and writes a
+deterministic artifact (a small header followed by the source bytes) to the
+-o path.  Behaviour is tuned through environment variables:
+
+    ETA_FAKE_ETAC_DELAY               seconds to sleep per compile (default 0)
+    ETA_FAKE_ETAC_FAIL_NO_PRELUDE=1   fail whenever --no-prelude is passed,
+                                      forcing the driver's retry path
+    ETA_FAKE_ETAC_EMBED_PATH=1        append the absolute source path to the
+                                      artifact, making it non-reproducible
+    ETA_FAKE_ETAC_REQUIRE_IMPORTS=1   fail unless every module named in an
+                                      (import ...) form has a .etac under
+                                      --path, to check dependency ordering
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+MAGIC = b"FAKEETAC"
+IMPORT_FORM = re.compile(rb"\(import\b([^)]*)\)")
+COMMENT = re.compile(rb";[^\n]*")
+
+
+def main(argv: list[str]) -> int:
+    no_prelude = "--no-prelude" in argv
+    args = [a for a in argv if a not in {"--no-prelude", "-O", "--no-debug"}]
+
+    out_file: Path | None = None
+    source: Path | None = None
+    search_root: Path | None = None
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in {"-o", "--path"}:
+            if idx + 1 >= len(args):
+                print(f"fake-etac: {arg} needs a value", file=sys.stderr)
+                return 2
+            if arg == "-o":
+                out_file = Path(args[idx + 1])
+            else:
+                search_root = Path(args[idx + 1])
+            idx += 2
+            continue
+        source = Path(arg)
+        idx += 1
+
+    if source is None or out_file is None:
+        print("fake-etac: usage: fake_etac.py [--no-prelude] --path ROOT -O --no-debug SRC -o OUT",
+              file=sys.stderr)
+        return 2
+
+    delay = float(os.environ.get("ETA_FAKE_ETAC_DELAY", "0") or 0)
+    if delay > 0:
+        time.sleep(delay)
+
+    if no_prelude and os.environ.get("ETA_FAKE_ETAC_FAIL_NO_PRELUDE") == "1":
+        print(f"fake-etac: {source}: prelude required", file=sys.stderr)
+        return 1
+
+    data = source.read_bytes()
+    if os.environ.get("ETA_FAKE_ETAC_REQUIRE_IMPORTS") == "1" and search_root is not None:
+        for form in IMPORT_FORM.finditer(COMMENT.sub(b"", data)):
+            for name in form.group(1).decode("utf-8").split():
+                artifact = search_root.joinpath(*name.split(".")).with_suffix(".etac")
+                if not artifact.is_file():
+                    print(f"fake-etac: {source}: import {name} has no artifact", file=sys.stderr)
+                    return 1
+    if os.environ.get("ETA_FAKE_ETAC_EMBED_PATH") == "1":
+        data += str(source.resolve()).encode("utf-8")
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    out_file.write_bytes(MAGIC + len(data).to_bytes(8, "little") + data)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
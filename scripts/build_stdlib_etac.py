@@ -1,21 +1,64 @@
 #!/usr/bin/env python3
-"""Build stdlib .etac artifacts with the existing etac CLI."""
+"""Build stdlib .etac artifacts with the existing etac CLI.
+
+With --verify, nothing is written to --out-root: the stdlib is instead built
+twice, concurrently, into two temporary roots that differ in absolute path
+and in environment ordering, and every artifact is byte-compared.  Any
+mismatch is reported with the .etac sections that differ and the script
+exits non-zero.
+
+With --workers, compiles are farmed out to etac_worker.py processes (see
+etac_protocol.py).  Modules are scheduled in import order: each job ships
+the module source plus the sources and freshly built .etac artifacts of
+everything it imports, transitively.  A job that fails on a worker for
+any reason other than a compile error is retried on another worker, then
+compiled locally unless --no-local-fallback is given.
+"""
 
 from __future__ import annotations
 
 import argparse
+import os
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Collection, NamedTuple, Sequence
+
+from etac_format import EtacFormatError, diff_sections
+from etac_protocol import ProtocolError, WorkerClient
+
+ETAC_FLAGS = ("-O", "--no-debug")
+DEFAULT_RETRIES = 2
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description=__doc__)
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument("--etac", required=True, help="Path to the etac executable")
     parser.add_argument("--src-root", required=True, help="Path to stdlib source root")
-    parser.add_argument("--out-root", required=True, help="Output root for mirrored .eta/.etac files")
-    return parser.parse_args()
+    parser.add_argument("--out-root", help="Output root for mirrored .eta/.etac files")
+    parser.add_argument("--verify", action="store_true",
+                        help="Build twice in separate temporary roots and byte-compare the artifacts")
+    parser.add_argument("--keep-temp", action="store_true",
+                        help="With --verify, keep the temporary build roots for inspection")
+    parser.add_argument("--workers", action="append", default=[], metavar="HOST:PORT[,...]",
+                        help="Compile on these etac_worker.py endpoints (repeatable)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Worker attempts per module after the first (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--no-local-fallback", action="store_true",
+                        help="Fail instead of compiling locally when no worker can take a module")
+    args = parser.parse_args()
+    if args.out_root is None and not args.verify:
+        parser.error("--out-root is required unless --verify is given")
+    if args.verify and args.workers:
+        parser.error("--verify builds locally; it cannot be combined with --workers")
+    return args
 
 
 def list_sources(src_root: Path) -> list[Path]:
@@ -45,7 +88,9 @@ def remove_stale_artifacts(out_root: Path) -> None:
         mirrored_source.unlink()
 
 
-def compile_source(etac_exe: Path, src_root: Path, source: Path, out_root: Path) -> None:
+def compile_source(etac_exe: Path, src_root: Path, source: Path, out_root: Path,
+                   env: dict[str, str] | None = None,
+                   flags: Sequence[str] = ETAC_FLAGS) -> None:
     rel = source.relative_to(src_root)
     out_file = (out_root / rel).with_suffix(".etac")
     out_file.parent.mkdir(parents=True, exist_ok=True)
@@ -55,15 +100,14 @@ def compile_source(etac_exe: Path, src_root: Path, source: Path, out_root: Path)
             str(etac_exe),
             "--path",
             str(src_root),
-            "-O",
-            "--no-debug",
+            *flags,
             str(source),
             "-o",
             str(out_file),
         ]
         if no_prelude:
             command.insert(1, "--no-prelude")
-        completed = subprocess.run(command, capture_output=True, text=True)
+        completed = subprocess.run(command, capture_output=True, text=True, env=env)
         return completed.returncode, command, completed.stdout, completed.stderr
 
     first_rc, first_cmd, first_out, first_err = run(no_prelude=True)
@@ -94,11 +138,265 @@ def compile_source(etac_exe: Path, src_root: Path, source: Path, out_root: Path)
     raise RuntimeError("\n".join(message))
 
 
+# ── Reproducibility check ────────────────────────────────────────────────
+
+class Mismatch(NamedTuple):
+    artifact: Path      # relative to the out root
+    detail: str
+
+
+def _verify_env(reverse: bool) -> dict[str, str]:
+    """The current environment, with variables in forward or reverse order."""
+    items = sorted(os.environ.items())
+    if reverse:
+        items.reverse()
+    return dict(items)
+
+
+def _build_tree(etac_exe: Path, sources: list[Path], src_root: Path,
+                root: Path, env: dict[str, str]) -> Path:
+    """Mirror ``sources`` under root/src and compile them into root/out."""
+    build_src = root / "src"
+    build_out = root / "out"
+    mirror_sources(sources, src_root, build_src)
+    for source in sources:
+        compile_source(etac_exe, build_src, build_src / source.relative_to(src_root), build_out, env)
+    return build_out
+
+
+def compare_artifacts(first: Path, second: Path) -> list[Mismatch]:
+    """Byte-compare the .etac files under two out roots."""
+    names_a = {p.relative_to(first) for p in first.rglob("*.etac")}
+    names_b = {p.relative_to(second) for p in second.rglob("*.etac")}
+    mismatches = [Mismatch(rel, "only produced by the first build") for rel in names_a - names_b]
+    mismatches += [Mismatch(rel, "only produced by the second build") for rel in names_b - names_a]
+    for rel in sorted(names_a & names_b):
+        a = (first / rel).read_bytes()
+        b = (second / rel).read_bytes()
+        if a == b:
+            continue
+        try:
+            diffs = diff_sections(a, b)
+        except EtacFormatError as exc:
+            mismatches.append(Mismatch(rel, f"contents differ ({len(a)} vs {len(b)} bytes); "
+                                            f"sections unavailable: {exc}"))
+            continue
+        detail = "; ".join(f"{d.section} (first in {d.first}, offset {d.offset})" for d in diffs)
+        mismatches.append(Mismatch(rel, detail or "contents differ"))
+    return sorted(mismatches)
+
+
+def verify(etac_exe: Path, src_root: Path, sources: list[Path], keep_temp: bool) -> int:
+    """Build the stdlib twice in parallel and report non-reproducible artifacts."""
+    base = Path(tempfile.mkdtemp(prefix="eta-stdlib-verify-"))
+    # Different lengths and depths, so any embedded absolute path shows up.
+    roots = [base / "a", base / "second-build" / "nested"]
+    envs = [_verify_env(reverse=False), _verify_env(reverse=True)]
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(_build_tree, etac_exe, sources, src_root, root, env)
+                       for root, env in zip(roots, envs)]
+            first, second = (f.result() for f in futures)
+        mismatches = compare_artifacts(first, second)
+    finally:
+        if keep_temp:
+            print(f"verify: build roots kept in {base}")
+        else:
+            shutil.rmtree(base, ignore_errors=True)
+
+    if mismatches:
+        for mismatch in mismatches:
+            print(f"{mismatch.artifact.as_posix()}: {mismatch.detail}", file=sys.stderr)
+        print(f"error: {len(mismatches)} of {len(sources)} stdlib artifacts are not reproducible",
+              file=sys.stderr)
+        return 1
+    print(f"verified {len(sources)} stdlib .etac artifacts are reproducible")
+    return 0
+
+
+# ── Distributed build ────────────────────────────────────────────────────
+
+_COMMENT = re.compile(r";[^\n]*")
+_IMPORT_FORM = re.compile(r"\(import\b([^)]*)\)")
+_NAME = re.compile(r"[^\s()]+")
+
+
+def module_name(src_root: Path, source: Path) -> str:
+    return ".".join(source.relative_to(src_root).with_suffix("").parts)
+
+
+def import_graph(sources: list[Path], src_root: Path) -> dict[Path, list[Path]]:
+    """Map each source to the sources it imports, within this tree."""
+    by_name = {module_name(src_root, source): source for source in sources}
+    graph: dict[Path, list[Path]] = {}
+    for source in sources:
+        text = _COMMENT.sub("", source.read_text(encoding="utf-8", errors="replace"))
+        deps = {by_name[name]
+                for form in _IMPORT_FORM.finditer(text)
+                for name in _NAME.findall(form.group(1))
+                if name in by_name}
+        deps.discard(source)
+        graph[source] = sorted(deps)
+    return graph
+
+
+def _closure(graph: dict[Path, list[Path]], source: Path) -> list[Path]:
+    seen: set[Path] = set()
+    stack = list(graph[source])
+    while stack:
+        dep = stack.pop()
+        if dep not in seen:
+            seen.add(dep)
+            stack.extend(graph[dep])
+    seen.discard(source)
+    return sorted(seen)
+
+
+class WorkerPool:
+    """Idle worker connections, one per advertised slot."""
+
+    def __init__(self, endpoints: list[str]) -> None:
+        self._idle: list[WorkerClient] = []
+        self._live: Counter[str] = Counter()
+        self._cond = threading.Condition()
+        for endpoint in endpoints:
+            clients: list[WorkerClient] = []
+            try:
+                clients.append(WorkerClient(endpoint))
+                clients += [WorkerClient(endpoint) for _ in range(clients[0].slots - 1)]
+            except (OSError, ProtocolError, ValueError) as exc:
+                print(f"warning: worker {endpoint} unavailable: {exc}", file=sys.stderr)
+                for client in clients:
+                    client.close()
+                continue
+            self._idle.extend(clients)
+            self._live[endpoint] = len(clients)
+        self.slots = len(self._idle)
+
+    def acquire(self, avoid: Collection[str] = ()) -> WorkerClient | None:
+        """Wait for an idle connection to a worker not in ``avoid``.
+
+        Returns None once no live connection is left outside ``avoid``, so a
+        job that already failed on every remaining worker is not sent back.
+        """
+        with self._cond:
+            while True:
+                for i in range(len(self._idle) - 1, -1, -1):
+                    if self._idle[i].endpoint not in avoid:
+                        return self._idle.pop(i)
+                if not any(n for endpoint, n in self._live.items() if endpoint not in avoid):
+                    return None
+                self._cond.wait()
+
+    def release(self, client: WorkerClient) -> None:
+        with self._cond:
+            self._idle.append(client)
+            self._cond.notify()
+
+    def discard(self, client: WorkerClient) -> None:
+        client.close()
+        with self._cond:
+            self._live[client.endpoint] -= 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            for client in self._idle:
+                client.close()
+            self._idle.clear()
+
+
+def _job_payload(src_root: Path, out_root: Path, source: Path, deps: list[Path]) -> dict[str, bytes]:
+    rel = source.relative_to(src_root)
+    blobs = {rel.as_posix(): source.read_bytes()}
+    for dep in deps:
+        dep_rel = dep.relative_to(src_root)
+        blobs[dep_rel.as_posix()] = dep.read_bytes()
+        artifact = (out_root / dep_rel).with_suffix(".etac")
+        if artifact.is_file():      # absent only inside an import cycle
+            blobs[dep_rel.with_suffix(".etac").as_posix()] = artifact.read_bytes()
+    return blobs
+
+
+def compile_distributed(etac_exe: Path, src_root: Path, sources: list[Path], out_root: Path,
+                        pool: WorkerPool, retries: int, local_fallback: bool) -> tuple[int, int]:
+    """Compile ``sources`` in import order across ``pool``; returns (remote, local) counts."""
+    graph = import_graph(sources, src_root)
+    counts = {"remote": 0, "local": 0}
+    lock = threading.Lock()
+
+    def build(source: Path) -> None:
+        rel = source.relative_to(src_root)
+        header = {"op": "compile", "source": rel.as_posix(), "flags": list(ETAC_FLAGS)}
+        blobs = _job_payload(src_root, out_root, source, _closure(graph, source))
+        where = "local"
+        failed: set[str] = set()
+        for _ in range(retries + 1):
+            client = pool.acquire(failed)
+            if client is None:
+                break
+            try:
+                reply = client.request(header, blobs)
+            except (OSError, ProtocolError) as exc:
+                print(f"warning: {client.endpoint} dropped {rel.as_posix()}: {exc}", file=sys.stderr)
+                pool.discard(client)
+                failed.add(client.endpoint)
+                continue
+            pool.release(client)
+            if reply.header.get("ok"):
+                out_file = (out_root / rel).with_suffix(".etac")
+                out_file.parent.mkdir(parents=True, exist_ok=True)
+                out_file.write_bytes(reply.blobs["artifact"])
+                where = "remote"
+                break
+            if reply.header.get("error") == "compile":
+                message = reply.header.get("message", f"error: etac failed for {source}")
+                raise RuntimeError(f"{message}\n(on worker {client.endpoint})")
+            print(f"warning: {client.endpoint} could not compile {rel.as_posix()}: "
+                  f"{reply.header.get('message')}", file=sys.stderr)
+            failed.add(client.endpoint)
+        if where == "local":
+            if not local_fallback:
+                raise RuntimeError(f"error: no worker could compile {source}")
+            compile_source(etac_exe, src_root, source, out_root)
+        with lock:
+            counts[where] += 1
+
+    waiting = {source: set(graph[source]) for source in sources}
+    dependents: dict[Path, list[Path]] = {source: [] for source in sources}
+    for source, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(source)
+
+    slots = pool.slots or os.cpu_count() or 1
+    running: dict[Future, Path] = {}
+    with ThreadPoolExecutor(max_workers=slots) as executor:
+        try:
+            while waiting or running:
+                ready = sorted(source for source, deps in waiting.items() if not deps)
+                if not ready and not running:
+                    # Import cycle: release one module and let etac sort it out.
+                    ready = [min(waiting)]
+                for source in ready:
+                    del waiting[source]
+                    running[executor.submit(build, source)] = source
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished = running.pop(future)
+                    future.result()
+                    for dependent in dependents[finished]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(finished)
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+    return counts["remote"], counts["local"]
+
+
 def main() -> int:
     args = parse_args()
     etac_exe = Path(args.etac).resolve()
     src_root = Path(args.src_root).resolve()
-    out_root = Path(args.out_root).resolve()
 
     if not etac_exe.is_file():
         print(f"error: etac executable not found: {etac_exe}", file=sys.stderr)
@@ -112,10 +410,29 @@ def main() -> int:
         print(f"error: no .eta files found under {src_root}", file=sys.stderr)
         return 1
 
+    if args.verify:
+        return verify(etac_exe, src_root, sources, args.keep_temp)
+
+    out_root = Path(args.out_root).resolve()
     out_root.mkdir(parents=True, exist_ok=True)
     remove_stale_artifacts(out_root)
     mirror_sources(sources, src_root, out_root)
 
+    endpoints = [e.strip() for arg in args.workers for e in arg.split(",") if e.strip()]
+    if endpoints:
+        pool = WorkerPool(endpoints)
+        if not pool.slots and args.no_local_fallback:
+            print("error: no etac workers available", file=sys.stderr)
+            return 1
+        try:
+            remote, local = compile_distributed(etac_exe, src_root, sources, out_root, pool,
+                                                max(0, args.retries), not args.no_local_fallback)
+        finally:
+            pool.close()
+        print(f"built {len(sources)} stdlib .etac artifacts in {out_root} "
+              f"({remote} on workers, {local} locally)")
+        return 0
+
     for source in sources:
         compile_source(etac_exe, src_root, source, out_root)
 
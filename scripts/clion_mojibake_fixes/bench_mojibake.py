@@ -0,0 +1,132 @@
+"""Micro-benchmark for the shared mojibake repair engine.
+
+Times the compiled single-pass engine against the old approach (one
+``str.replace`` per fix-table entry, then a per-line FFFD sweep) over the
+docs/, editors/ and C++ source trees, and checks both produce identical
+output.  Nothing is written back to disk.
+
+--fuzz N also compares them on N random strings built from fix-table keys,
+replacements, pieces of keys, U+FFFD and line breaks, which is where
+nested mojibake ("ÃÂ¼") and line-boundary differences show up.
+
+Usage:
+    python scripts/clion_mojibake_fixes/bench_mojibake.py
+    python scripts/clion_mojibake_fixes/bench_mojibake.py --repeat 10 docs
+    python scripts/clion_mojibake_fixes/bench_mojibake.py --fuzz 100000 docs
+"""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+from mojibake_engine import DOCS_ENGINE, FFFD, FIXES, REPO_ROOT, repair_fffd_line
+
+TREES = {
+    "docs":    ({".md", ".js", ".ts"}, REPO_ROOT / "docs"),
+    "editors": ({".js", ".ts", ".json", ".md"}, REPO_ROOT / "editors"),
+    "cpp":     ({".cpp", ".cc", ".cxx", ".c", ".h", ".hpp", ".hxx", ".hh"}, REPO_ROOT / "eta"),
+}
+SKIP_DIRS = {'build', 'out', '.git', 'node_modules', 'third_party', '_deps', 'CMakeFiles'}
+
+
+def _legacy_repair(text: str) -> str:
+    """The pre-engine pipeline: ~90 replace passes, then a line sweep."""
+    for src in sorted(FIXES, key=len, reverse=True):
+        if src in text:
+            text = text.replace(src, FIXES[src])
+    if FFFD not in text:
+        return text
+    return "".join(repair_fffd_line(ln) for ln in text.splitlines(keepends=True))
+
+
+def fuzz(count: int, seed: int = 1) -> int:
+    """Compare legacy and engine on ``count`` random strings; return mismatches."""
+    rng = random.Random(seed)
+    keys = sorted(FIXES)
+    fragments = {k[i:j] for k in keys for i in range(len(k)) for j in range(i + 1, len(k) + 1)}
+    pieces = [*keys, *FIXES.values(), *sorted(fragments),
+              FFFD, "\n", "\r", "\r\n", "\u2028", " ", "`", "a"]
+    mismatched = 0
+    for _ in range(count):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+        if _legacy_repair(text) != DOCS_ENGINE.repair(text):
+            if mismatched < 5:
+                print(f"  !! output differs: {text!r}")
+            mismatched += 1
+    return mismatched
+
+
+def load_tree(root: pathlib.Path, exts: set[str]) -> list[tuple[pathlib.Path, str]]:
+    texts = []
+    for p in sorted(root.rglob("*")):
+        if not p.is_file() or p.suffix not in exts:
+            continue
+        if any(d in p.parts for d in SKIP_DIRS):
+            continue
+        try:
+            texts.append((p, p.read_text(encoding="utf-8")))
+        except UnicodeDecodeError:
+            continue
+    return texts
+
+
+def _time(fn, texts: list[tuple[pathlib.Path, str]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("trees", nargs="*", metavar="tree",
+                    help=f"trees to benchmark: {', '.join(TREES)} (default: all)")
+    ap.add_argument("--repeat", type=int, default=5,
+                    help="timing repetitions; the best run is reported (default: 5)")
+    ap.add_argument("--fuzz", type=int, default=0, metavar="N",
+                    help="also compare outputs on N random fix-table strings")
+    args = ap.parse_args()
+    unknown = set(args.trees) - set(TREES)
+    if unknown:
+        ap.error(f"unknown tree(s): {', '.join(sorted(unknown))}")
+
+    mismatched = 0
+    print(f"{'tree':<8} {'files':>6} {'MB':>7} {'legacy ms':>10} {'engine ms':>10} "
+          f"{'ms/file':>8} {'speedup':>8}")
+    for name in args.trees or TREES:
+        exts, root = TREES[name]
+        texts = load_tree(root, exts)
+        if not texts:
+            print(f"{name:<8} (no files under {root})")
+            continue
+
+        for path, text in texts:
+            if _legacy_repair(text) != DOCS_ENGINE.repair(text):
+                print(f"  !! output differs: {path.relative_to(REPO_ROOT)}")
+                mismatched += 1
+
+        size_mb = sum(len(t.encode("utf-8")) for _, t in texts) / 1e6
+        legacy = _time(_legacy_repair, texts, args.repeat)
+        engine = _time(DOCS_ENGINE.repair, texts, args.repeat)
+        print(f"{name:<8} {len(texts):>6} {size_mb:>7.2f} {legacy * 1e3:>10.1f} "
+              f"{engine * 1e3:>10.1f} {engine * 1e3 / len(texts):>8.3f} "
+              f"{legacy / engine if engine else float('inf'):>7.1f}x")
+
+    if args.fuzz:
+        fuzz_mismatched = fuzz(args.fuzz)
+        print(f"fuzz: {fuzz_mismatched} of {args.fuzz} strings differ")
+        mismatched += fuzz_mismatched
+
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
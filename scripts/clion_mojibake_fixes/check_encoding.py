@@ -1,25 +1,429 @@
+"""Audit source and docs files for encoding problems, working on raw bytes.
+
+One pass over the tree replaces the separate walks that check_mojibake.py,
+check_mojibake_cpp.py and the old one-off BOM check used to do:
+
+  - SKIP_DIRS are pruned during the walk, never descended into.
+  - Each file is probed as bytes (via mmap for large files); pure-ASCII
+    files cannot hold a BOM, invalid UTF-8 or mojibake and are skipped
+    without decoding.
+  - Remaining files are checked for a UTF-8/UTF-16 BOM, invalid UTF-8 and
+    double-encoded UTF-8 (a UTF-8 sequence whose bytes were read as
+    Latin-1/Windows-1252 and re-encoded), all on bytes.
+  - With --strict-ascii, any non-ASCII byte in a C/C++ file is reported too.
+  - Files are fanned out over a process pool; results are printed as text,
+    JSON or SARIF 2.1.0.
+  - --changed/--staged limit the run to the git change set, and a result
+    cache skips files already known clean (see incremental.py).
+
+Usage:
+    python scripts/clion_mojibake_fixes/check_encoding.py                 # whole repo
+    python scripts/clion_mojibake_fixes/check_encoding.py docs editors
+    python scripts/clion_mojibake_fixes/check_encoding.py --format sarif > enc.sarif
+    python scripts/clion_mojibake_fixes/check_encoding.py --staged        # pre-commit
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
 import pathlib
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, NamedTuple
+
+import incremental
+from mojibake_engine import REPO_ROOT
+
+ROOT = REPO_ROOT
+
+CPP_EXTS = {'.cpp', '.cc', '.cxx', '.c', '.h', '.hpp', '.hxx', '.hh'}
+TEXT_EXTS = {'.md', '.js', '.ts', '.json', '.eta', '.py', '.txt', '.cmake', '.toml'}
+EXTS = CPP_EXTS | TEXT_EXTS
+SKIP_DIRS = {'build', 'out', '.git', 'node_modules', 'third_party', '_deps', 'CMakeFiles',
+             # this directory: the fix tables are mojibake by design
+             'clion_mojibake_fixes'}
+SKIP_FILES = {incremental.DEFAULT_CACHE.name}
+
+# Files at least this large are probed through mmap rather than read().
+MMAP_THRESHOLD = 1 << 20
+# Below this many files a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 256
+
+BOMS = (
+    (b'\xef\xbb\xbf', 'UTF-8 BOM (EF BB BF)'),
+    (b'\xff\xfe', 'UTF-16 LE BOM (FF FE)'),
+    (b'\xfe\xff', 'UTF-16 BE BOM (FE FF)'),
+)
+
+NON_ASCII_BYTE = re.compile(rb'[\x80-\xff]')
+
+
+def _double_encoded_pattern() -> re.Pattern[bytes]:
+    """Byte regex for a UTF-8 sequence that went through Latin-1/cp1252.
+
+    A lead byte 0xC2-0xDF (or 0xE0-0xEF) followed by one (or two)
+    continuation bytes 0x80-0xBF turns into two (or three) codepoints; we
+    match the UTF-8 encoding of those codepoints.  Continuation bytes may
+    have been read as Latin-1 (U+0080-U+00BF) or as their cp1252 glyphs.
+    """
+    def alt(chars: Iterable[str]) -> bytes:
+        encoded = sorted({c.encode('utf-8') for c in chars}, key=lambda e: (-len(e), e))
+        return b'(?:' + b'|'.join(re.escape(e) for e in encoded) + b')'
+
+    cont_chars = set()
+    for b in range(0x80, 0xC0):
+        cont_chars.add(chr(b))
+        try:
+            cont_chars.add(bytes([b]).decode('cp1252'))
+        except UnicodeDecodeError:
+            pass
+    cont = alt(cont_chars)
+    lead2 = alt(chr(b) for b in range(0xC2, 0xE0))
+    lead3 = alt(chr(b) for b in range(0xE0, 0xF0))
+    return re.compile(lead3 + cont + cont + b'|' + lead2 + cont)
+
+
+DETECT_BYTES = _double_encoded_pattern()
+
+
+class Finding(NamedTuple):
+    path: str       # repo-relative, POSIX separators
+    line: int       # 1-based
+    column: int     # 1-based, in codepoints
+    kind: str       # 'bom' | 'invalid-utf8' | 'mojibake' | 'non-ascii'
+    detail: str
+
+
+RULES = {
+    'bom':          ('error',   'File starts with a byte order mark'),
+    'invalid-utf8': ('error',   'File is not valid UTF-8'),
+    'mojibake':     ('error',   'Double-encoded UTF-8 sequence'),
+    'non-ascii':    ('warning', 'Non-ASCII byte in a C/C++ source file'),
+}
+
+
+# ── Traversal ─────────────────────────────────────────────────────────────────
+
+def iter_files(roots: Iterable[pathlib.Path], exts: set[str] = EXTS) -> Iterator[pathlib.Path]:
+    """Yield files under ``roots`` with a suffix in ``exts``, pruning SKIP_DIRS/SKIP_FILES."""
+    for root in roots:
+        if root.is_file():
+            if root.suffix in exts and root.name not in SKIP_FILES:
+                yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if os.path.splitext(name)[1] in exts and name not in SKIP_FILES:
+                    yield pathlib.Path(dirpath, name)
+
+
+def select_files(roots: Iterable[pathlib.Path], args: argparse.Namespace,
+                 exts: set[str] = EXTS) -> list[pathlib.Path]:
+    """iter_files(), or just the git change set when --changed/--staged is given.
+
+    In incremental mode the tree is never walked: the changed files come
+    from git and are kept if they lie under one of ``roots`` and outside
+    SKIP_DIRS.  With --staged a path need not exist in the working tree,
+    since audit_staged() reads the index.
+    """
+    if args.changed is None and not args.staged:
+        return list(iter_files(roots, exts))
+    bases = [os.path.realpath(root) for root in roots]
+    selected = []
+    for path in sorted(incremental.changed_files(args.changed, args.staged)):
+        if path.suffix not in exts or path.name in SKIP_FILES:
+            continue
+        if not args.staged and not path.is_file():
+            continue
+        full = str(path)
+        for base in bases:
+            if full == base:
+                selected.append(path)
+                break
+            prefix = os.path.join(base, '')
+            if full.startswith(prefix):
+                if not SKIP_DIRS.intersection(full[len(prefix):].split(os.sep)[:-1]):
+                    selected.append(path)
+                break
+    return selected
+
+
+# ── Per-file audit (runs in worker processes) ─────────────────────────────────
+
+class _Probe(NamedTuple):
+    st: os.stat_result
+    digest: str | None      # only computed when a cache will store it
+    data: bytes | None      # None if the file is empty or pure ASCII
+
+
+def _probe(path: pathlib.Path, want_digest: bool = False) -> _Probe:
+    """Stat and read ``path``, keeping the bytes only if they are non-ASCII."""
+    st = path.stat()
+    if st.st_size == 0:
+        return _Probe(st, incremental.digest(b'') if want_digest else None, None)
+    if st.st_size < MMAP_THRESHOLD:
+        data = path.read_bytes()
+        digest = incremental.digest(data) if want_digest else None
+        return _Probe(st, digest, None if data.isascii() else data)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        digest = incremental.digest(mm) if want_digest else None
+        if NON_ASCII_BYTE.search(mm) is None:
+            return _Probe(st, digest, None)
+        return _Probe(st, digest, mm[:])
+
+
+class _Locator:
+    """Byte offset -> (line, column), counting newlines incrementally.
+
+    Offsets from one finditer() are increasing, so each lookup only counts
+    the newlines since the previous one instead of from the file start.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.offset = 0
+        self.line = 1
+
+    def __call__(self, offset: int) -> tuple[int, int]:
+        if offset < self.offset:
+            self.offset, self.line = 0, 1
+        self.line += self.data.count(b'\n', self.offset, offset)
+        self.offset = offset
+        line_start = self.data.rfind(b'\n', 0, offset) + 1
+        column = len(self.data[line_start:offset].decode('utf-8', errors='replace')) + 1
+        return self.line, column
+
+
+def audit_bytes(rel: str, data: bytes, strict_ascii: bool = False) -> list[Finding]:
+    """Audit one file's contents; ``rel`` is only used to label findings."""
+    findings: list[Finding] = []
+    position = _Locator(data)
+
+    for bom, label in BOMS:
+        if data.startswith(bom):
+            findings.append(Finding(rel, 1, 1, 'bom', label))
+            break
+
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        line, column = position(e.start)
+        context = data[max(0, e.start - 10):e.start + 10].hex(' ')
+        findings.append(Finding(rel, line, column, 'invalid-utf8',
+                                f'{e.reason} at byte {e.start} (bytes around: {context})'))
+
+    for m in DETECT_BYTES.finditer(data):
+        line, column = position(m.start())
+        seq = m.group().decode('utf-8', errors='replace')
+        try:
+            intended = seq.encode('cp1252').decode('utf-8')
+        except UnicodeError:
+            try:
+                intended = seq.encode('latin-1').decode('utf-8')
+            except UnicodeError:
+                intended = '?'
+        findings.append(Finding(rel, line, column, 'mojibake', f'{seq!r} -> {intended!r}'))
+
+    if strict_ascii:
+        seen_lines: set[int] = set()
+        for m in NON_ASCII_BYTE.finditer(data):
+            line, column = position(m.start())
+            if line in seen_lines:
+                continue
+            seen_lines.add(line)
+            ch = data[m.start():m.start() + 4].decode('utf-8', errors='replace')[0]
+            findings.append(Finding(rel, line, column, 'non-ascii', f'U+{ord(ch):04X} {ch!r}'))
+
+    return findings
+
+
+def _rel(path: pathlib.Path, base: pathlib.Path) -> str:
+    full = os.path.abspath(path)
+    prefix = os.path.join(os.path.abspath(base), '')
+    if full.startswith(prefix):
+        return full[len(prefix):].replace(os.sep, '/')
+    try:
+        return path.resolve().relative_to(base).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _scan(path: pathlib.Path, base: pathlib.Path, strict_ascii: bool,
+          want_digest: bool, known_hash: str | None = None
+          ) -> tuple[list[Finding] | None, _Probe]:
+    """Findings for ``path``, or None if its hash equals ``known_hash``."""
+    probe = _probe(path, want_digest or known_hash is not None)
+    if known_hash is not None and probe.digest == known_hash:
+        return None, probe._replace(data=None)
+    if probe.data is None:
+        return [], probe
+    findings = audit_bytes(_rel(path, base), probe.data, strict_ascii and path.suffix in CPP_EXTS)
+    return findings, probe._replace(data=None)
+
+
+def audit_file(path: pathlib.Path, base: pathlib.Path, strict_ascii: bool = False) -> list[Finding]:
+    return _scan(path, base, strict_ascii, want_digest=False)[0]
+
+
+def _audit_job(job: tuple[str, str, bool, bool, str | None]
+               ) -> tuple[list[Finding] | None, _Probe]:
+    path, base, strict_ascii, want_digest, known_hash = job
+    return _scan(pathlib.Path(path), pathlib.Path(base), strict_ascii, want_digest, known_hash)
+
+
+def open_cache(args: argparse.Namespace, strict_ascii: bool) -> incremental.ScanCache:
+    """The result cache for this auditor; --strict-ascii runs are kept apart."""
+    namespace = 'check_encoding:strict' if strict_ascii else 'check_encoding'
+    rules = incremental.fingerprint(DETECT_BYTES.pattern, BOMS, sorted(SKIP_FILES))
+    return incremental.ScanCache.from_args(args, namespace, rules)
+
+
+def audit(paths: list[pathlib.Path], base: pathlib.Path = ROOT,
+          strict_ascii: bool = False, jobs: int | None = None,
+          cache: incremental.ScanCache | None = None) -> list[Finding]:
+    """Audit ``paths``, in parallel when there are enough of them.
+
+    With a ``cache``, unchanged files are answered from it (findings
+    included) and every scanned file's findings are recorded, hashed by
+    the worker that read it; the caller saves the cache.  A file whose
+    mtime moved but whose size did not is hashed by the worker first, and
+    not scanned if the hash matches the cache.
+    """
+    findings: list[Finding] = []
+    known: dict[pathlib.Path, str | None] = {}
+    if cache is not None:
+        todo = []
+        for path in paths:
+            st = path.stat()
+            cached = cache.get(path, st)
+            if cached is None:
+                todo.append(path)
+                known[path] = cache.known_hash(path, st)
+            else:
+                rel = _rel(path, base)
+                findings.extend(Finding(rel, *f) for f in cached)
+        paths = todo
+    jobs = jobs or os.cpu_count() or 1
+    work = [(str(p), str(base), strict_ascii, cache is not None, known.get(p)) for p in paths]
+    if jobs == 1 or len(work) < PARALLEL_MIN_FILES:
+        results = list(map(_audit_job, work))
+    else:
+        chunksize = max(16, len(work) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_audit_job, work, chunksize=chunksize))
+    for path, (batch, probe) in zip(paths, results):
+        if batch is None:
+            cached = cache.get(path, probe.st, probe.digest) if cache is not None else None
+            if cached is not None:
+                rel = _rel(path, base)
+                findings.extend(Finding(rel, *f) for f in cached)
+                continue
+            batch, probe = _scan(path, base, strict_ascii, cache is not None)
+        if cache is not None:
+            cache.record(path, [list(f[1:]) for f in batch], probe.digest, probe.st)
+        findings.extend(batch)
+    return findings
+
+
+def audit_staged(paths: list[pathlib.Path], base: pathlib.Path = ROOT,
+                 strict_ascii: bool = False) -> list[Finding]:
+    """Audit the content staged in the git index for ``paths``, for pre-commit use.
+
+    The working-tree copy may hold unstaged edits, so it is never read and
+    the result cache (keyed on working-tree stats) is not consulted.
+    """
+    findings: list[Finding] = []
+    for path, data in incremental.staged_contents(paths).items():
+        if data.isascii():
+            continue
+        findings.extend(audit_bytes(_rel(path, base), data,
+                                    strict_ascii and path.suffix in CPP_EXTS))
+    return findings
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+
+def format_text(findings: list[Finding]) -> str:
+    if not findings:
+        return 'clean -- no encoding problems found.'
+    lines = [f'{f.path}:{f.line}:{f.column}: {f.kind}: {f.detail}' for f in findings]
+    lines.append(f'\n{len(findings)} finding(s) in {len({f.path for f in findings})} file(s).')
+    return '\n'.join(lines)
+
+
+def format_json(findings: list[Finding]) -> str:
+    return json.dumps([f._asdict() for f in findings], indent=2, ensure_ascii=False)
+
+
+def format_sarif(findings: list[Finding]) -> str:
+    rules = [
+        {'id': kind, 'shortDescription': {'text': text},
+         'defaultConfiguration': {'level': level}}
+        for kind, (level, text) in RULES.items()
+    ]
+    results = [
+        {
+            'ruleId': f.kind,
+            'level': RULES[f.kind][0],
+            'message': {'text': f.detail},
+            'locations': [{
+                'physicalLocation': {
+                    'artifactLocation': {'uri': f.path, 'uriBaseId': 'SRCROOT'},
+                    'region': {'startLine': f.line, 'startColumn': f.column},
+                },
+            }],
+        }
+        for f in findings
+    ]
+    log = {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'check_encoding', 'rules': rules}},
+            'columnKind': 'unicodeCodePoints',
+            'results': results,
+        }],
+    }
+    return json.dumps(log, indent=2, ensure_ascii=False)
+
+
+FORMATTERS = {'text': format_text, 'json': format_json, 'sarif': format_sarif}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('paths', nargs='*', help='files or directories to audit (default: repo root)')
+    ap.add_argument('--format', choices=sorted(FORMATTERS), default='text',
+                    help='output format (default: text)')
+    ap.add_argument('--strict-ascii', action='store_true',
+                    help='also report non-ASCII bytes in C/C++ files')
+    ap.add_argument('--cpp-only', action='store_true',
+                    help='only audit C/C++ sources and headers')
+    ap.add_argument('-j', '--jobs', type=int, default=None,
+                    help='worker processes (default: CPU count)')
+    incremental.add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    roots = [pathlib.Path(p) for p in args.paths] or [ROOT]
+    exts = CPP_EXTS if args.cpp_only else EXTS
+    files = select_files(roots, args, exts)
+    if args.staged:
+        findings = audit_staged(files, ROOT, args.strict_ascii)
+    else:
+        cache = open_cache(args, args.strict_ascii)
+        findings = audit(files, ROOT, args.strict_ascii, args.jobs, cache)
+        cache.save()
+    findings.sort(key=lambda f: (f.path, f.line, f.column))
+
+    print(FORMATTERS[args.format](findings))
+    return 1 if findings else 0
 
-p = pathlib.Path(r'C:\Users\lewis\develop\eta\eta\qa\test\src\builtin_sync_tests.cpp')
-raw = p.read_bytes()
-print(f'File size: {len(raw)} bytes')
-print(f'First 6 bytes: {raw[:6].hex()}')
-
-if raw[:3] == b'\xef\xbb\xbf':
-    print('Has UTF-8 BOM (EF BB BF) -- this is the problem CLion sees')
-elif raw[:2] == b'\xff\xfe':
-    print('Has UTF-16 LE BOM')
-elif raw[:2] == b'\xfe\xff':
-    print('Has UTF-16 BE BOM')
-else:
-    print('No BOM')
-
-try:
-    raw.decode('utf-8')
-    print('Valid UTF-8: YES')
-except UnicodeDecodeError as e:
-    print(f'UTF-8 decode FAILED at byte {e.start}: {e}')
-    pos = e.start
-    ctx = raw[max(0, pos-10):pos+10]
-    print(f'Bytes around error: {ctx.hex()}')
 
+if __name__ == '__main__':
+    sys.exit(main())
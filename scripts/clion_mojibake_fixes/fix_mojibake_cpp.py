@@ -11,14 +11,16 @@ Strategy:
 from __future__ import annotations
 import pathlib
 import re
-import sys
 
-ROOT = pathlib.Path(__file__).resolve().parent.parent
+import incremental
+from check_encoding import select_files
+from mojibake_engine import REPO_ROOT, FixEngine
+
+ROOT = REPO_ROOT
 
 SKIP = {"intern_table_tests.cpp"}
 
 EXTS = {'.cpp', '.cc', '.cxx', '.c', '.h', '.hpp', '.hxx', '.hh'}
-SKIP_DIRS = {'build', 'out', '.git', 'node_modules', 'third_party', '_deps', 'CMakeFiles'}
 
 # ── cp1252 → utf-8 re-decode ─────────────────────────────────────────────────
 
@@ -68,13 +70,14 @@ UNICODE_TO_ASCII = [
 ]
 
 NON_ASCII = re.compile(r'[^\x00-\x7F]')
+# Ordinary "..." literals on one line; comments and raw strings are left alone.
+STRING_LITERAL = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+
+_ASCII_ENGINE = FixEngine(dict(UNICODE_TO_ASCII))
 
 def fix_non_ascii_in_strings(line: str) -> str:
     """Replace non-ASCII chars that end up inside C++ string literals."""
-    result = line
-    for src, dst in UNICODE_TO_ASCII:
-        result = result.replace(src, dst)
-    return result
+    return _ASCII_ENGINE.repair(line)
 
 # ── Main ──────────────────────────────────────────────────────────────────────
 
@@ -96,9 +99,9 @@ def process_file(path: pathlib.Path) -> tuple[bool, str]:
         # 2. cp1252 → utf-8 re-decode
         line = cp1252_repair(line)
 
-        # 3. Replace remaining non-ASCII with ASCII equivalents
+        # 3. Replace remaining non-ASCII inside string literals with ASCII equivalents
         if NON_ASCII.search(line):
-            line = fix_non_ascii_in_strings(line)
+            line = STRING_LITERAL.sub(lambda m: fix_non_ascii_in_strings(m.group()), line)
 
         out.append(line)
 
@@ -107,20 +110,27 @@ def process_file(path: pathlib.Path) -> tuple[bool, str]:
 
 
 def main():
-    dry_run = '--dry-run' in sys.argv
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--dry-run', action='store_true',
+                    help='report changes without writing files')
+    incremental.add_arguments(ap)
+    args = ap.parse_args()
+    dry_run = args.dry_run
 
-    files = [
-        p for p in ROOT.rglob('*')
-        if p.is_file()
-        and p.suffix in EXTS
-        and not any(d in p.parts for d in SKIP_DIRS)
-        and p.name not in SKIP
-    ]
-    files.sort()
+    # Pruned walk, or only the git change set with --changed/--staged.
+    files = [p for p in select_files([ROOT], args, EXTS) if p.name not in SKIP]
+    cache = incremental.ScanCache.from_args(
+        args, 'fix_mojibake_cpp', incremental.fingerprint(UNICODE_TO_ASCII, sorted(SKIP)))
 
     changed_count = 0
-    for f in files:
+    for f in cache.pending(files):
         changed, new_text = process_file(f)
+        if not new_text:
+            continue
+        cache.record(f, changed)
         if changed:
             changed_count += 1
             rel = f.relative_to(ROOT)
@@ -129,6 +139,7 @@ def main():
             else:
                 f.write_text(new_text, encoding='utf-8')
                 print(f'  fixed: {rel}')
+    cache.save()
 
     print(f'\n{"[DRY RUN] Would fix" if dry_run else "Fixed"} {changed_count} file(s).')
 
@@ -0,0 +1,230 @@
+"""Git-aware file selection and a result cache for the encoding checks.
+
+Two independent ways to avoid rescanning an unchanged tree:
+
+  --changed [REF]  only consider files that differ from REF (default HEAD)
+                   in the working tree, plus untracked files
+  --staged         only consider files staged in the index (pre-commit);
+                   the auditors (check_encoding.py, check_mojibake_cpp.py)
+                   read the staged content itself, while the fixers
+                   (check_mojibake.py, fix_mojibake_cpp.py) work on the
+                   working-tree copies of the staged paths they rewrite
+
+and a small JSON cache keyed by path, holding (size, mtime_ns, content
+hash) -> the checker's result for that file (its findings; empty when the
+file is clean).  A file whose size and mtime are unchanged is answered
+from the cache without being read, findings included.  If only the mtime
+moved (a fresh checkout, a touch, a branch switch and back), the file is
+hashed and a matching hash still answers from the cache, refreshing the
+entry's mtime.  Anything else is rescanned and re-recorded; the content
+hash is computed by whoever already has the bytes in hand, and the cache
+file is only rewritten when an entry actually changed.
+
+Each checker uses its own cache namespace and a fingerprint of its rules,
+so editing a fix table or detector invalidates that checker's entries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import subprocess
+from typing import Iterable
+
+from mojibake_engine import REPO_ROOT
+
+DEFAULT_CACHE = REPO_ROOT / ".encoding-cache.json"
+CACHE_VERSION = 2
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    """Register --changed/--staged/--cache/--no-cache on ``ap``."""
+    group = ap.add_argument_group("incremental mode")
+    which = group.add_mutually_exclusive_group()
+    which.add_argument("--changed", nargs="?", const="HEAD", metavar="REF",
+                       help="only scan files changed relative to REF (default: HEAD), "
+                            "including untracked files")
+    which.add_argument("--staged", action="store_true",
+                       help="only scan files staged in the git index (auditors check the "
+                            "staged content, fixers the working-tree copy)")
+    group.add_argument("--cache", default=str(DEFAULT_CACHE), metavar="PATH",
+                       help=f"result cache file (default: {DEFAULT_CACHE.name} in the repo root)")
+    group.add_argument("--no-cache", action="store_true",
+                       help="ignore and do not update the result cache")
+
+
+def _git(args: list[str], cwd: pathlib.Path) -> list[str]:
+    completed = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {completed.stderr.strip()}")
+    return [line for line in completed.stdout.splitlines() if line]
+
+
+def changed_files(ref: str | None = None, staged: bool = False,
+                  repo: pathlib.Path = REPO_ROOT) -> set[pathlib.Path]:
+    """Absolute paths of files added/copied/modified/renamed vs ``ref`` or the index."""
+    if staged:
+        names = _git(["diff", "--cached", "--name-only", "--diff-filter=ACMR"], repo)
+    else:
+        names = _git(["diff", "--name-only", "--diff-filter=ACMR", ref or "HEAD"], repo)
+        names += _git(["ls-files", "--others", "--exclude-standard"], repo)
+    top = pathlib.Path(_git(["rev-parse", "--show-toplevel"], repo)[0])
+    return {(top / name).resolve() for name in names}
+
+
+def staged_contents(paths: Iterable[pathlib.Path],
+                    repo: pathlib.Path = REPO_ROOT) -> dict[pathlib.Path, bytes]:
+    """The index version of each of ``paths``, read in one ``git cat-file --batch``.
+
+    Paths that are not in the index are left out.
+    """
+    top = pathlib.Path(_git(["rev-parse", "--show-toplevel"], repo)[0]).resolve()
+    paths = list(paths)
+    names = [pathlib.Path(os.path.abspath(p)).relative_to(top).as_posix() for p in paths]
+    request = "".join(f":{name}\n" for name in names).encode("utf-8")
+    completed = subprocess.run(["git", "cat-file", "--batch"], cwd=top, input=request,
+                               capture_output=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"git cat-file --batch failed: "
+                           f"{completed.stderr.decode('utf-8', 'replace').strip()}")
+    out, pos, blobs = completed.stdout, 0, {}
+    for path in paths:
+        end = out.index(b"\n", pos)
+        header = out[pos:end].split()
+        pos = end + 1
+        if len(header) != 3 or header[1] != b"blob":
+            continue                    # "<name> missing", or not a file
+        size = int(header[2])
+        blobs[path] = out[pos:pos + size]
+        pos += size + 1
+    return blobs
+
+
+def fingerprint(*parts: object) -> str:
+    """Stable digest of a checker's rules, used to invalidate its cache."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(repr(part).encode("utf-8", errors="surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def digest(data: bytes | memoryview) -> str:
+    """Content hash stored alongside each cache entry."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ScanCache:
+    """(path, size, mtime, hash) -> scan result, persisted as JSON.
+
+    A result is any JSON value; falsy means the file is clean.  ``namespace``
+    separates checkers sharing one file; ``rules`` is the checker's
+    fingerprint() and drops the namespace's entries when it changes.  A
+    disabled cache (``path=None``) never hits and never saves.
+    """
+
+    def __init__(self, path: pathlib.Path | None, namespace: str, rules: str) -> None:
+        self.path = path
+        self.namespace = namespace
+        self._dirty = False
+        self._data: dict = {"version": CACHE_VERSION, "namespaces": {}}
+        if path is not None and path.is_file():
+            try:
+                loaded = json.loads(path.read_text(encoding="utf-8"))
+                if loaded.get("version") == CACHE_VERSION:
+                    self._data = loaded
+            except (OSError, ValueError):
+                pass
+        ns = self._data["namespaces"].get(namespace)
+        if ns is None or ns.get("rules") != rules:
+            ns = {"rules": rules, "files": {}}
+            self._data["namespaces"][namespace] = ns
+            self._dirty = True
+        self._files: dict[str, list] = ns["files"]
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, namespace: str, rules: str) -> "ScanCache":
+        return cls(None if args.no_cache else pathlib.Path(args.cache), namespace, rules)
+
+    @staticmethod
+    def _key(path: pathlib.Path) -> str:
+        # abspath, not resolve(): this runs per file and must not hit the disk.
+        return os.path.abspath(path)
+
+    def get(self, path: pathlib.Path, st: os.stat_result | None = None,
+            content_hash: str | None = None):
+        """The recorded result for ``path``, or None if it may have changed.
+
+        Matching size and mtime are enough.  When only the mtime differs, a
+        ``content_hash`` equal to the recorded one also counts, and the
+        entry takes the new mtime so the next run needs no hash.
+        """
+        if self.path is None:
+            return None
+        entry = self._files.get(self._key(path))
+        if entry is None:
+            return None
+        st = st or path.stat()
+        if st.st_size != entry[0]:
+            return None
+        if st.st_mtime_ns != entry[1]:
+            if content_hash is None or content_hash != entry[2]:
+                return None
+            entry[1] = st.st_mtime_ns
+            self._dirty = True
+        return entry[3]
+
+    def known_hash(self, path: pathlib.Path, st: os.stat_result | None = None) -> str | None:
+        """The recorded hash, if hashing ``path`` could still answer get()."""
+        if self.path is None:
+            return None
+        entry = self._files.get(self._key(path))
+        if entry is None:
+            return None
+        st = st or path.stat()
+        return entry[2] if st.st_size == entry[0] else None
+
+    def record(self, path: pathlib.Path, result, content_hash: str | None = None,
+               st: os.stat_result | None = None) -> None:
+        """Store ``result`` for ``path``; hashes the file unless ``content_hash`` is given.
+
+        ``st`` should be the stat taken *before* the bytes were read, so a
+        file modified mid-scan looks stale on the next run.
+        """
+        if self.path is None:
+            return
+        st = st or path.stat()
+        if content_hash is None:
+            content_hash = digest(path.read_bytes())
+        entry = [st.st_size, st.st_mtime_ns, content_hash, result]
+        key = self._key(path)
+        if self._files.get(key) != entry:
+            self._files[key] = entry
+            self._dirty = True
+
+    def pending(self, files: Iterable[pathlib.Path]) -> list[pathlib.Path]:
+        """Return the files that are not known to be clean."""
+        pending = []
+        for f in files:
+            st = f.stat()
+            result = self.get(f, st)
+            if result is None and self.known_hash(f, st) is not None:
+                result = self.get(f, st, digest(f.read_bytes()))
+            if result is None or result:
+                pending.append(f)
+        return pending
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        for key in [k for k in self._files if not os.path.exists(k)]:
+            del self._files[key]
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,329 @@
+"""Shared single-pass repair engine for the mojibake fixers.
+
+The fix table is compiled once, at import time, into a single alternation
+regex (longest key first, so 'â€"' wins over 'â€').  ``re.sub`` then walks
+the text exactly once and substitutes every hit from a dict lookup, instead
+of one ``str.replace`` pass per table entry.
+
+Lines that contain U+FFFD are located with ``str.find`` during the same
+left-to-right walk and handed to the context-aware FFFD rules used by
+fix_mojibake_docs.py, rather than splitting and re-scanning every line.
+Only lines holding nested mojibake ("ÃÂ¼") are rescanned, by the old
+replace chain (see FixEngine).
+
+Usage:
+    from mojibake_engine import DOCS_ENGINE, FIXES_ENGINE
+    fixed = FIXES_ENGINE.repair(text)      # double-encoded UTF-8 only
+    fixed = DOCS_ENGINE.repair(text)       # ... plus the FFFD context rules
+"""
+
+from __future__ import annotations
+
+import pathlib
+import re
+from typing import Callable, Mapping
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+FFFD = "\ufffd"
+MDOT = "\u00b7"    # middle dot
+ARROW = "\u2192"   # rightwards arrow
+EMDASH = "\u2014"  # em dash
+ELLIP = "\u2026"   # ellipsis
+
+# Map of mojibake -> intended character.  FixEngine tries longer keys first.
+FIXES: dict[str, str] = {
+    "â€\u009d": "\u201D",   # right double quotation mark
+    "â€\u009c": "\u201C",   # left  double quotation mark
+    "â€œ":      "\u201C",
+    "â€™":      "\u2019",   # right single quote / apostrophe
+    "â€˜":      "\u2018",
+    "â€”":      "—",        # em dash
+    "â€“":      "–",        # en dash
+    "â€¢":      "•",
+    "â€¦":      "…",
+    "â†’":      "→",
+    "â†':":     "→:",
+    "â†'":      "→",
+    "â†\u0090": "←",
+    "â†\u0091": "↑",
+    "â†\u0093": "↓",
+    "Î·":       "η",
+    "Â·":       "·",
+    "Â\u00A0":  "\u00A0",   # already NBSP — drop the spurious Â prefix
+    "Â»":       "»",
+    "Â«":       "«",
+    "Â©":       "©",
+    "Â®":       "®",
+    "Â°":       "°",
+    "Â±":       "±",
+    "Â²":       "²",
+    "Â³":       "³",
+    "Â¹":       "¹",
+    "Â¼":       "¼",
+    "Â½":       "½",
+    "Â¾":       "¾",
+    # Box drawing (used in CMake banner blocks copy-pasted into docs)
+    "â•‘": "║", "â•—": "╗", "â•":  "═", "â•‘": "║", "â•":  "═",
+    "â•”": "╔", "â•š": "╚", "â•": "╝", "â•”": "╔",
+    "â”€": "─", "â”‚": "│", "â”Œ": "┌", "â”": "┐",
+    "â””": "└", "â”˜": "┘", "â”œ": "├", "â”¤": "┤",
+    "â”¬": "┬", "â”´": "┴", "â”¼": "┼",
+    "â–º": "►", "â–¶": "▶", "â–ª": "▪", "â–«": "▫", "â–\u0091": "▒",
+    # Common accented letters (just in case)
+    "Ã©": "é", "Ã¨": "è", "Ãª": "ê", "Ã«": "ë",
+    "Ã¡": "á", "Ã ": "à", "Ã¢": "â", "Ã¤": "ä",
+    "Ã­": "í", "Ã®": "î", "Ã¯": "ï",
+    "Ã³": "ó", "Ã²": "ò", "Ã´": "ô", "Ã¶": "ö",
+    "Ãº": "ú", "Ã¹": "ù", "Ã»": "û", "Ã¼": "ü",
+    "Ã±": "ñ", "Ã§": "ç",
+    "Ã‰": "É", "Ãˆ": "È",
+    "ÃŸ": "ß",
+}
+
+# A loose detector for "anything that *looks* like mojibake" so we can
+# flag survivors that aren't yet in the fix map.
+DETECT = re.compile(
+    "(?:"
+    r"\u00C3[\u0080-\u00BF]"        # Ã + cont
+    r"|\u00C2[\u0080-\u00BF]"       # Â + cont
+    r"|\u00E2\u0080[\u0080-\u00BF]" # â€…
+    r"|\u00E2\u0086[\u0080-\u00BF]" # â†…
+    r"|\u00E2\u0094[\u0080-\u00BF]" # â”… box-drawing light
+    r"|\u00E2\u0095[\u0080-\u00BF]" # â•… box-drawing heavy
+    r"|\u00E2\u0096[\u0080-\u00BF]" # â–… block elements
+    r"|\u00CE\u00B7"                # Î·
+    ")"
+)
+
+
+# Line boundaries recognised by str.splitlines().
+_LINE_BREAK_CHARS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+_LINE_BREAK = re.compile("\r\n|[" + _LINE_BREAK_CHARS + "]")
+
+
+def _nesting_triggers(fixes: Mapping[str, str]) -> set[str]:
+    """Spellings in which a replacement can complete another key.
+
+    Either a key's replacement runs on into a key together with what
+    follows it (``"Ã¢"`` -> ``"â"``, then ``"€"``...), or a key follows a
+    prefix of another key and its replacement completes that key
+    (``"Ã"`` + ``"Â¼"`` -> ``"Ã¼"``).  Only texts containing one of these
+    can come out of the replace chain differently from a single scan.
+    """
+    keys = [k for k in fixes if k]
+
+    def joins(head: str, key: str) -> bool:
+        return key.startswith(head) or head.startswith(key)
+
+    triggers: set[str] = set()
+    for k in keys:
+        value = fixes[k]
+        for i in range(len(value)):
+            for key in keys:
+                tail = value[i:]
+                if tail.startswith(key):
+                    triggers.add(k)
+                elif key.startswith(tail):
+                    rest = key[len(tail):]
+                    triggers.add(k + rest[0])
+                    triggers.update(k + k2 for k2 in keys if joins(fixes[k2], rest))
+    for key in keys:
+        for n in range(1, len(key)):
+            prefix = key[:n]
+            triggers.update(prefix + k for k in keys if joins(prefix + fixes[k], key))
+    return triggers
+
+
+class _Nested(Exception):
+    """Raised inside a table scan that met a spelling that can nest."""
+
+
+class FixEngine:
+    """A fix table (plus optional per-line rule) compiled into one regex.
+
+    ``fixes`` maps each bad sequence to its replacement.  When ``line_rule``
+    is given, every line containing ``line_marker`` is handed to it *after*
+    the table has been applied to that line; all other text only sees the
+    table.  The result is the same as a longest-key-first ``str.replace``
+    chain followed by a ``str.splitlines`` sweep of the line rule, as long
+    as no two keys overlap in the text (no key of ``FIXES`` contains
+    another key's first character past its own start, so they cannot).
+
+    Nested mojibake, where a replacement completes another key with the
+    text around it (``"ÃÂ¼"`` -> ``"Ã¼"``), is not caught by the single
+    scan.  The few spellings that can nest are matched by the same pattern;
+    the lines that contain one are run through the chain itself, so they
+    come out exactly as the chain would leave them.
+    """
+
+    def __init__(
+        self,
+        fixes: Mapping[str, str],
+        line_rule: Callable[[str], str] | None = None,
+        line_marker: str = FFFD,
+    ) -> None:
+        self.fixes = dict(fixes)
+        self.line_rule = line_rule
+        self.line_marker = line_marker
+
+        keys = sorted(self.fixes, key=len, reverse=True)
+        self._chain_keys = [k for k in keys if k]
+        # The nesting triggers ride along in the table pattern, so spotting
+        # them costs nothing extra; _sub_fix aborts the scan on one.
+        self._nesting = _nesting_triggers(self.fixes)
+        table = "|".join(re.escape(k) for k in sorted(
+            self._nesting.union(self._chain_keys), key=len, reverse=True))
+        # A table of non-ASCII keys can never match pure-ASCII text.
+        self._ascii_inert = all(not k.isascii() for k in keys) and (
+            line_rule is None or not line_marker.isascii()
+        )
+        self._table = re.compile(table) if table else None
+        self._nesting_re = re.compile("|".join(re.escape(t) for t in self._nesting))
+        # Nesting cannot cross a newline unless a key or replacement holds one.
+        self._line_local = not any("\n" in k or "\n" in v for k, v in self.fixes.items())
+        # Likewise the table cannot move line breaks or markers, so marked
+        # lines can be found before it runs, in the same walk.
+        special = _LINE_BREAK_CHARS + line_marker
+        self._same_walk = not any(c in k or c in v for k, v in self.fixes.items()
+                                  for c in special)
+
+    def _sub_fix(self, m: re.Match) -> str:
+        key = m.group()
+        if key in self._nesting:
+            raise _Nested
+        return self.fixes[key]
+
+    def repair_table(self, text: str) -> str:
+        """Apply only the fix table (no line rule)."""
+        if self._table is None:
+            return text
+        try:
+            return self._table.sub(self._sub_fix, text)
+        except _Nested:
+            pass
+        if not self._line_local:
+            return self._repair_chain(text)
+
+        # Only the lines that can nest go through the chain; the rest hold
+        # no trigger, so the table scan over them runs to completion.
+        out: list[str] = []
+        pos = 0
+        for m in self._nesting_re.finditer(text):
+            if m.start() < pos:
+                continue
+            start = text.rfind("\n", pos, m.start()) + 1 or pos
+            end = text.find("\n", m.end())
+            end = len(text) if end < 0 else end + 1
+            out.append(self._table.sub(self._sub_fix, text[pos:start]))
+            out.append(self._repair_chain(text[start:end]))
+            pos = end
+        out.append(self._table.sub(self._sub_fix, text[pos:]))
+        return "".join(out)
+
+    def _repair_chain(self, text: str) -> str:
+        """One ``str.replace`` per key, longest first, for text that can nest."""
+        for key in self._chain_keys:
+            if key in text:
+                text = text.replace(key, self.fixes[key])
+        return text
+
+    def repair(self, text: str) -> str:
+        """Apply the fix table and, in the same walk, the line rule to marked lines.
+
+        Lines are delimited as by ``str.splitlines``, so a lone ``\\r``,
+        ``\\f``, ``\\x85``, ``\\u2028`` and friends end a line too.
+        """
+        if self._ascii_inert and text.isascii():
+            return text
+        marker = self.line_marker
+        if self.line_rule is None or marker not in text:
+            return self.repair_table(text)
+        table = self.repair_table
+        if not self._same_walk:
+            text, table = table(text), lambda part: part
+
+        # ``pos`` is always at a line start; text between marked lines only
+        # sees the table, each marked line sees the table and then the rule.
+        out: list[str] = []
+        pos = 0
+        hit = text.find(marker)
+        while hit >= 0:
+            start = max(text.rfind(c, pos, hit) for c in _LINE_BREAK_CHARS) + 1 or pos
+            brk = _LINE_BREAK.search(text, hit)
+            end = brk.end() if brk else len(text)
+            out.append(table(text[pos:start]))
+            out.append(self.line_rule(table(text[start:end])))
+            pos = end
+            hit = text.find(marker, pos)
+        out.append(table(text[pos:]))
+        return "".join(out)
+
+
+# ── FFFD context rules (docs) ────────────────────────────────────────────────
+
+_SQUARE_CUBE = re.compile(r"`\(x\) " + FFFD + r" x" + FFFD + r"`")
+_LINK_SEP = re.compile(r"(\]\([^)]*\))\s*" + FFFD)
+_SECTION_HEADER = re.compile(r"^(?:#+\s+`std\.|####\s+Pass\s+\d+)")
+_IN_BACKTICKS = re.compile(r"`([^`]*" + FFFD + r"[^`]*)`")
+_POPULATE = re.compile(FFFD + r"\s*(populate)")
+_AFTER_BACKTICK = re.compile(r"`\s*" + FFFD + r"\s*")
+
+_CODE_FORMS = tuple(
+    (f"({form} {FFFD})", f"({form} {ELLIP})") for form in ("module", "export", "import")
+)
+
+_KEYWORD_REPL = {
+    "dynamic-wind":       EMDASH,
+    "Create a socket":    EMDASH,
+    "publishDiagnostics": EMDASH,
+    "survey-time":        ELLIP,
+    "dag:parents":        ELLIP,
+}
+
+
+def _fix_in_backtick(m: re.Match) -> str:
+    """Replace FFFD inside a single-backtick span with an arrow."""
+    return "`" + m.group(1).replace(FFFD, ARROW) + "`"
+
+
+def repair_fffd_line(line: str) -> str:
+    """Replace U+FFFD in one docs line; rules are listed in fix_mojibake_docs.py."""
+    if FFFD not in line:
+        return line
+
+    if "`square`" in line:
+        line = _SQUARE_CUBE.sub("`(x) \u2192 x\u00b2`", line)
+    if "`cube`" in line:
+        line = _SQUARE_CUBE.sub("`(x) \u2192 x\u00b3`", line)
+
+    for src, dst in _CODE_FORMS:
+        line = line.replace(src, dst)
+
+    if "zero-grad" in line and FFFD in line:
+        parts = line.split(FFFD)
+        return parts[0] + EMDASH + ARROW.join(parts[1:])
+
+    line = _LINK_SEP.sub(r"\1 " + MDOT, line)
+
+    if _SECTION_HEADER.match(line):
+        return line.replace(FFFD, EMDASH)
+
+    line = _IN_BACKTICKS.sub(_fix_in_backtick, line)
+    line = _POPULATE.sub(ARROW + r" \1", line)
+
+    for kw, repl in _KEYWORD_REPL.items():
+        if kw in line and FFFD in line:
+            return line.replace(FFFD, repl)
+
+    line = _AFTER_BACKTICK.sub("` " + EMDASH + " ", line)
+    return line.replace(FFFD, EMDASH)
+
+
+FIXES_ENGINE = FixEngine(FIXES)
+DOCS_ENGINE = FixEngine(FIXES, line_rule=repair_fffd_line)
+
+
+def repair(text: str) -> str:
+    """Repair double-encoded UTF-8 using the shared fix table."""
+    return FIXES_ENGINE.repair(text)
@@ -0,0 +1,217 @@
+"""Read-only section map of .etac artifacts, for comparing two builds.
+
+Mirrors the layout written by BytecodeSerializer::serialize
+(eta/core/src/eta/runtime/vm/bytecode_serializer.cpp).  Every byte of an
+artifact is attributed to exactly one section:
+
+    header          magic, version, flags, hashes, compiler id, package
+                    metadata, dependency hashes, counts and the imports table
+    symbol table    module table (names, slots, import/export bindings) and
+                    each function's local and upvalue names
+    constant pool   each function's constants
+    functions       each function's name, arity, stack size and instructions
+    debug spans     each function's source map (only with FLAG_HAS_DEBUG)
+
+Nothing is decoded beyond what is needed to find section boundaries.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import NamedTuple
+
+MAGIC = b"ETAC"
+FORMAT_VERSION_V3 = 3
+FORMAT_VERSION_V4 = 4
+FORMAT_VERSION = 5
+SUPPORTED_VERSIONS = (FORMAT_VERSION_V3, FORMAT_VERSION_V4, FORMAT_VERSION)
+
+FLAG_HAS_DEBUG = 0x0001
+FLAG_HAS_PACKAGE_META = 0x0002
+FLAG_HAS_DEPHASH = 0x0004
+
+COMPILER_ID_SIZE = 16
+SPAN_SIZE = 5 * 4
+INSTRUCTION_SIZE = 1 + 4
+
+HEADER = "header"
+SYMBOL_TABLE = "symbol table"
+CONSTANT_POOL = "constant pool"
+FUNCTIONS = "functions"
+DEBUG_SPANS = "debug spans"
+SECTIONS = (HEADER, SYMBOL_TABLE, CONSTANT_POOL, FUNCTIONS, DEBUG_SPANS)
+
+# ConstTag values from bytecode_serializer.h
+CT_NIL, CT_TRUE, CT_FIXNUM, CT_DOUBLE, CT_CHAR, CT_STRING, CT_SYMBOL = range(7)
+CT_FUNC_INDEX, CT_HEAP_CONS, CT_HEAP_VEC, CT_RAW_BITS, CT_HEAP_NIL, CT_FALSE = range(7, 13)
+_FIXED_CONSTANT_SIZE = {
+    CT_NIL: 0, CT_TRUE: 0, CT_FALSE: 0, CT_HEAP_NIL: 0,
+    CT_FIXNUM: 8, CT_DOUBLE: 8, CT_RAW_BITS: 8,
+    CT_CHAR: 4, CT_FUNC_INDEX: 4,
+}
+
+
+class EtacFormatError(ValueError):
+    """The bytes are not a well-formed .etac artifact."""
+
+
+class Region(NamedTuple):
+    section: str
+    label: str      # e.g. "module table", "function #3 'map'"
+    start: int
+    end: int
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def take(self, n: int) -> bytes:
+        end = self.pos + n
+        if n < 0 or end > len(self.data):
+            raise EtacFormatError(f"truncated at offset {self.pos}")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def u8(self) -> int:
+        return self.take(1)[0]
+
+    def u16(self) -> int:
+        return struct.unpack("<H", self.take(2))[0]
+
+    def u32(self) -> int:
+        return struct.unpack("<I", self.take(4))[0]
+
+    def skip(self, n: int) -> None:
+        self.take(n)
+
+    def string(self) -> str:
+        return self.take(self.u32()).decode("utf-8", errors="replace")
+
+    def strings(self) -> None:
+        for _ in range(self.u32()):
+            self.skip(self.u32())
+
+    def constant(self) -> None:
+        tag = self.u8()
+        if tag in _FIXED_CONSTANT_SIZE:
+            self.skip(_FIXED_CONSTANT_SIZE[tag])
+        elif tag in (CT_STRING, CT_SYMBOL):
+            self.skip(self.u32())
+        elif tag == CT_HEAP_CONS:
+            self.constant()
+            self.constant()
+        elif tag == CT_HEAP_VEC:
+            for _ in range(self.u32()):
+                self.constant()
+        else:
+            raise EtacFormatError(f"unknown constant tag {tag} at offset {self.pos - 1}")
+
+
+def split_sections(data: bytes) -> list[Region]:
+    """Partition ``data`` into contiguous regions, in file order."""
+    r = _Reader(data)
+    regions: list[Region] = []
+    mark = 0
+
+    def close(section: str, label: str) -> None:
+        nonlocal mark
+        regions.append(Region(section, label, mark, r.pos))
+        mark = r.pos
+
+    if r.take(4) != MAGIC:
+        raise EtacFormatError("bad magic")
+    version = r.u16()
+    if version not in SUPPORTED_VERSIONS:
+        raise EtacFormatError(f"unsupported format version {version}")
+    flags = r.u16()
+    r.skip(8 + 4)                           # source hash, builtin count
+    if version >= FORMAT_VERSION_V4:
+        r.skip(COMPILER_ID_SIZE)
+        if flags & FLAG_HAS_PACKAGE_META:
+            r.skip(r.u32())                 # package name
+            r.skip(r.u32())                 # package version
+            r.skip(8)                       # manifest hash
+        if flags & FLAG_HAS_DEPHASH:
+            for _ in range(r.u32()):
+                r.skip(r.u32())
+                r.skip(8)
+    num_modules = r.u32()
+    num_functions = r.u32()
+    r.strings()                             # imports table
+    close(HEADER, "header")
+
+    for _ in range(num_modules):
+        r.string()
+        r.skip(4 + 4 + 1 + 4)               # init index, globals, has_main, main slot
+        if version >= FORMAT_VERSION:
+            r.skip(4 + 4)                   # first function, function count
+            r.skip(4 * r.u32())             # owned global slots
+            for _ in range(r.u32()):        # import bindings
+                r.skip(4)
+                r.skip(r.u32())
+                r.skip(r.u32())
+            for _ in range(r.u32()):        # export bindings
+                r.skip(r.u32())
+                r.skip(4)
+    close(SYMBOL_TABLE, "module table")
+
+    for index in range(num_functions):
+        name = r.string()
+        label = f"function #{index} {name!r}"
+        r.skip(4 + 1 + 4)                   # arity, has_rest, stack size
+        close(FUNCTIONS, label)
+        for _ in range(r.u32()):
+            r.constant()
+        close(CONSTANT_POOL, label)
+        ncode = r.u32()
+        r.skip(ncode * INSTRUCTION_SIZE)
+        close(FUNCTIONS, label)
+        if flags & FLAG_HAS_DEBUG:
+            r.skip(ncode * SPAN_SIZE)
+            close(DEBUG_SPANS, label)
+        r.strings()                         # local names
+        r.strings()                         # upvalue names
+        close(SYMBOL_TABLE, label)
+
+    if r.pos != len(data):
+        raise EtacFormatError(f"{len(data) - r.pos} trailing bytes after function table")
+    return regions
+
+
+class SectionDiff(NamedTuple):
+    section: str
+    first: str      # label of the first differing region in that section
+    offset: int     # offset of the first differing byte in the first artifact
+
+
+def _first_difference(a: bytes, b: bytes) -> int:
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i
+    return min(len(a), len(b))
+
+
+def diff_sections(a: bytes, b: bytes) -> list[SectionDiff]:
+    """Sections in which two artifacts differ, in SECTIONS order.
+
+    Regions are paired in file order, so a structural change (say, an extra
+    constant) is reported where it first happens; later regions that merely
+    moved are not counted as differences.  Raises EtacFormatError if either
+    artifact cannot be parsed.
+    """
+    ra, rb = split_sections(a), split_sections(b)
+    found: dict[str, SectionDiff] = {}
+    for x, y in zip(ra, rb):
+        if x.section in found:
+            continue
+        chunk_a, chunk_b = a[x.start:x.end], b[y.start:y.end]
+        if x.section != y.section or chunk_a != chunk_b:
+            found[x.section] = SectionDiff(
+                x.section, x.label, x.start + _first_difference(chunk_a, chunk_b))
+    if len(ra) != len(rb):
+        extra = (ra if len(ra) > len(rb) else rb)[min(len(ra), len(rb))]
+        found.setdefault(extra.section, SectionDiff(extra.section, extra.label, extra.start))
+    return [found[s] for s in SECTIONS if s in found]
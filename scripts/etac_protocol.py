@@ -0,0 +1,145 @@
+"""Wire protocol between build_stdlib_etac.py and etac_worker.py.
+
+Every message is one frame:
+
+    u32  header length (little-endian)
+    ...  header, UTF-8 JSON object
+    ...  payload: the blobs listed in header["blobs"], back to back
+
+header["blobs"] is a list of [name, size] pairs, so payloads never need
+escaping.  Requests carry an "op":
+
+    ping      -> {"ok": true, "slots": N, "protocol": PROTOCOL_VERSION}
+    compile   header: "source" (relative path of the module to compile),
+              "flags" (etac flags; workers accept only -O and --no-debug);
+              blobs: the module source and every dependency source and
+              .etac, named by relative path
+              -> {"ok": true} with blob "artifact", or
+                 {"ok": false, "error": "compile" | "worker", "message": ...}
+
+A compile error means etac rejected the module and is final; a worker
+error means the worker could not run the job, so the coordinator may try
+elsewhere.  One connection carries any number of request/response pairs.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import struct
+from pathlib import PurePosixPath
+from typing import NamedTuple
+
+PROTOCOL_VERSION = 1
+MAX_HEADER = 1 << 20
+MAX_BLOB = 1 << 30
+CONNECT_TIMEOUT = 5.0
+# Generous: a compile on a loaded worker can take a while.
+REPLY_TIMEOUT = 600.0
+
+
+class ProtocolError(RuntimeError):
+    """Malformed frame, version mismatch or a dropped connection."""
+
+
+class Message(NamedTuple):
+    header: dict
+    blobs: dict[str, bytes]
+
+
+def parse_endpoint(text: str) -> tuple[str, int]:
+    """'host:port' -> (host, port)."""
+    host, sep, port = text.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise ValueError(f"expected HOST:PORT, got {text!r}")
+    return host.strip("[]"), int(port)
+
+
+def safe_relpath(name: str) -> PurePosixPath:
+    """Validate a blob name as a relative path that stays inside its root."""
+    path = PurePosixPath(name)
+    if not name or path.is_absolute() or ".." in path.parts or ":" in name or "\\" in name:
+        raise ProtocolError(f"unsafe path in message: {name!r}")
+    return path
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:], size - got)
+        if n == 0:
+            raise ProtocolError("connection closed mid-frame")
+        got += n
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, header: dict, blobs: dict[str, bytes] | None = None) -> None:
+    blobs = blobs or {}
+    header = dict(header, blobs=[[name, len(data)] for name, data in blobs.items()])
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    sock.sendall(struct.pack("<I", len(encoded)) + encoded)
+    for data in blobs.values():
+        sock.sendall(data)
+
+
+def _is_blob_entry(entry: object) -> bool:
+    return (isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], str)
+            and isinstance(entry[1], int) and not isinstance(entry[1], bool))
+
+
+def recv_message(sock: socket.socket) -> Message | None:
+    """Read one frame; None if the peer closed the connection cleanly."""
+    first = sock.recv(4)
+    if not first:
+        return None
+    if len(first) < 4:
+        first += _recv_exact(sock, 4 - len(first))
+    (length,) = struct.unpack("<I", first)
+    if length > MAX_HEADER:
+        raise ProtocolError(f"header of {length} bytes exceeds limit")
+    try:
+        header = json.loads(_recv_exact(sock, length))
+    except ValueError as exc:
+        raise ProtocolError(f"bad header: {exc}") from None
+    if not isinstance(header, dict):
+        raise ProtocolError(f"bad header: expected an object, got {type(header).__name__}")
+    table = header.pop("blobs", [])
+    if not isinstance(table, list) or not all(_is_blob_entry(entry) for entry in table):
+        raise ProtocolError("bad header: blobs must be a list of [name, size] pairs")
+    blobs: dict[str, bytes] = {}
+    for name, size in table:
+        if not 0 <= size <= MAX_BLOB:
+            raise ProtocolError(f"blob {name!r} of {size} bytes exceeds limit")
+        blobs[name] = _recv_exact(sock, size)
+    return Message(header, blobs)
+
+
+class WorkerClient:
+    """One connection to an etac worker."""
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        host, port = parse_endpoint(endpoint)
+        self._sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+        self._sock.settimeout(REPLY_TIMEOUT)
+        reply = self.request({"op": "ping"})
+        if reply.header.get("protocol") != PROTOCOL_VERSION:
+            self.close()
+            raise ProtocolError(f"{endpoint}: protocol {reply.header.get('protocol')}, "
+                                f"expected {PROTOCOL_VERSION}")
+        self.slots = max(1, int(reply.header.get("slots", 1)))
+
+    def request(self, header: dict, blobs: dict[str, bytes] | None = None) -> Message:
+        send_message(self._sock, header, blobs)
+        reply = recv_message(self._sock)
+        if reply is None:
+            raise ProtocolError(f"{self.endpoint}: worker closed the connection")
+        return reply
+
+    def close(self) -> None:
+        try:
+            self._sock.close()
+        except OSError:
+            pass
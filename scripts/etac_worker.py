@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Serve etac compiles to build_stdlib_etac.py --workers.
+
+Each compile request arrives with the module source and its dependencies'
+sources and .etac artifacts (see etac_protocol.py).  They are unpacked into
+a private scratch tree, the module is compiled there with compile_source()
+(including its --no-prelude retry), and the artifact is sent back.
+
+Usage:
+    python scripts/etac_worker.py --etac build/etac --listen 0.0.0.0:7451 --jobs 8
+
+Port 0 picks a free port; the bound address is printed on startup.
+There is no authentication, so only listen on trusted networks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from build_stdlib_etac import ETAC_FLAGS, compile_source
+from etac_protocol import (PROTOCOL_VERSION, ProtocolError, parse_endpoint, recv_message,
+                           safe_relpath, send_message)
+
+# Requests are unauthenticated and their flags end up on the etac command
+# line, so only the flags the coordinator itself sends are accepted.
+ALLOWED_FLAGS = frozenset(ETAC_FLAGS)
+
+
+class EtacWorker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], etac: Path, jobs: int, scratch: Path | None) -> None:
+        super().__init__(address, _Handler)
+        self.etac = etac
+        self.jobs = jobs
+        self.scratch = scratch
+        self.slots = threading.BoundedSemaphore(jobs)
+
+    def compile(self, header: dict, blobs: dict[str, bytes]) -> tuple[dict, dict[str, bytes]]:
+        try:
+            source = safe_relpath(header["source"])
+            flags = [str(flag) for flag in header.get("flags", [])]
+            rejected = [flag for flag in flags if flag not in ALLOWED_FLAGS]
+            if rejected:
+                raise ProtocolError(f"flags not allowed: {' '.join(rejected)}")
+            if str(source) not in blobs:
+                raise ProtocolError(f"request does not include {source}")
+            files = [(safe_relpath(name), data) for name, data in blobs.items()]
+        except (KeyError, TypeError, ProtocolError) as exc:
+            return {"ok": False, "error": "worker", "message": f"bad compile request: {exc}"}, {}
+
+        with self.slots:
+            job = Path(tempfile.mkdtemp(prefix="etac-job-", dir=self.scratch))
+            try:
+                src_root = job / "src"
+                for rel, data in files:
+                    target = src_root / rel
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_bytes(data)
+                out_root = job / "out"
+                try:
+                    compile_source(self.etac, src_root, src_root / source, out_root, flags=flags)
+                except RuntimeError as exc:
+                    return {"ok": False, "error": "compile", "message": str(exc)}, {}
+                artifact = (out_root / source).with_suffix(".etac").read_bytes()
+                return {"ok": True}, {"artifact": artifact}
+            except OSError as exc:
+                return {"ok": False, "error": "worker", "message": f"{type(exc).__name__}: {exc}"}, {}
+            finally:
+                shutil.rmtree(job, ignore_errors=True)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: EtacWorker
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        while True:
+            try:
+                message = recv_message(sock)
+            except (ProtocolError, OSError):
+                return
+            if message is None:
+                return
+            op = message.header.get("op")
+            if op == "ping":
+                reply, blobs = {"ok": True, "slots": self.server.jobs,
+                                "protocol": PROTOCOL_VERSION}, {}
+            elif op == "compile":
+                reply, blobs = self.server.compile(message.header, message.blobs)
+            else:
+                reply, blobs = {"ok": False, "error": "worker", "message": f"unknown op {op!r}"}, {}
+            try:
+                send_message(sock, reply, blobs)
+            except OSError:
+                return
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--etac", required=True, help="Path to the etac executable")
+    parser.add_argument("--listen", default="127.0.0.1:0", metavar="HOST:PORT",
+                        help="Address to listen on (default: 127.0.0.1:0)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Concurrent compiles (default: CPU count)")
+    parser.add_argument("--scratch", help="Directory for per-job scratch trees (default: system temp)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    etac = Path(args.etac).resolve()
+    if not etac.is_file():
+        print(f"error: etac executable not found: {etac}", file=sys.stderr)
+        return 1
+    try:
+        address = parse_endpoint(args.listen)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    scratch = Path(args.scratch).resolve() if args.scratch else None
+    if scratch is not None:
+        scratch.mkdir(parents=True, exist_ok=True)
+
+    with EtacWorker(address, etac, max(1, args.jobs), scratch) as server:
+        host, port = server.server_address[:2]
+        print(f"etac worker listening on {host}:{port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
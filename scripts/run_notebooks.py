@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Execute the cookbook notebooks headlessly on a pool of warm eta_jupyter kernels.
+
+Kernels are started once and reused: between notebooks the runner sends the
+kernel's `%reset` magic (fresh driver, same process) and `%cwd` to the
+notebook's directory, instead of paying process start and kernel handshake
+again.  Notebooks run in parallel, one per kernel.
+
+For every code cell the runner records wall-clock execution time and diffs
+the produced outputs against the outputs stored in the notebook.  Volatile
+text (timings, addresses) is masked before comparison.
+
+Requires `jupyter_client` and a registered `eta` kernelspec
+(`eta_jupyter --install --user`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+NOTEBOOK_DIR = REPO_ROOT / "cookbook" / "notebooks"
+
+DEFAULT_MASKS = (
+    r"\b\d+(?:\.\d+)?\s?(?:ns|us|µs|ms|s)\b",  # %time / %timeit output
+    r"\b0x[0-9a-fA-F]{6,}\b",                 # heap addresses
+)
+# Diff lines printed per mismatching cell; the JSON report keeps them all.
+DIFF_PRINT_LIMIT = 40
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("notebooks", nargs="*",
+                        help="notebooks to run (default: cookbook/notebooks/*.ipynb, "
+                             "excluding Untitled*)")
+    parser.add_argument("-j", "--jobs", type=int, default=2,
+                        help="number of warm kernels, i.e. notebooks run in parallel (default: 2)")
+    parser.add_argument("--kernel", default="eta", help="kernelspec name (default: eta)")
+    parser.add_argument("--startup-timeout", type=float, default=120.0,
+                        help="seconds to wait for a kernel to become ready (default: 120)")
+    parser.add_argument("--cell-timeout", type=float, default=300.0,
+                        help="seconds to wait for one cell (default: 300)")
+    parser.add_argument("--mask", action="append", default=[], metavar="REGEX",
+                        help="extra regex whose matches are ignored when diffing outputs")
+    parser.add_argument("--no-diff", action="store_true",
+                        help="execute and time only; do not compare outputs")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-cell execution times")
+    parser.add_argument("--json", metavar="PATH", help="write a JSON report to PATH")
+    return parser.parse_args()
+
+
+def default_notebooks() -> list[Path]:
+    return sorted(p for p in NOTEBOOK_DIR.glob("*.ipynb") if not p.name.startswith("Untitled"))
+
+
+# ── Kernel pool ───────────────────────────────────────────────────────────────
+
+class KernelError(RuntimeError):
+    """The kernel died, timed out or could not be reset."""
+
+
+class WarmKernel:
+    """One eta_jupyter process plus a blocking client, reused across notebooks."""
+
+    def __init__(self, kernel_name: str, startup_timeout: float) -> None:
+        from jupyter_client.manager import KernelManager
+
+        self.startup_timeout = startup_timeout
+        self.manager = KernelManager(kernel_name=kernel_name)
+        self.client = None
+        self.notebooks_run = 0
+        self.restarts = 0
+        self.startup_seconds = 0.0
+        self.restart_seconds = 0.0
+        self.restart()
+
+    def restart(self) -> None:
+        """Start the kernel process, or restart it if one is running."""
+        started = time.perf_counter()
+        restarting = self.manager.has_kernel
+        if restarting:
+            self.manager.restart_kernel(now=True)
+            self.restarts += 1
+        else:
+            self.manager.start_kernel()
+        if self.client is not None:
+            self.client.stop_channels()
+        self.client = self.manager.client()
+        self.client.start_channels()
+        try:
+            self.client.wait_for_ready(timeout=self.startup_timeout)
+        except RuntimeError as exc:
+            raise KernelError(f"kernel did not become ready: {exc}") from None
+        finally:
+            elapsed = time.perf_counter() - started
+            if restarting:
+                self.restart_seconds += elapsed
+            else:
+                self.startup_seconds = elapsed
+        self.notebooks_run = 0
+
+    def execute(self, code: str, timeout: float) -> tuple[str, list[dict[str, Any]]]:
+        """Run ``code``; return (reply status, outputs in nbformat shape)."""
+        msg_id = self.client.execute(code, store_history=False, allow_stdin=False)
+        outputs: list[dict[str, Any]] = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise KernelError(f"cell timed out after {timeout:.0f}s")
+            try:
+                msg = self.client.get_iopub_msg(timeout=remaining)
+            except queue.Empty:
+                if not self.manager.is_alive():
+                    raise KernelError("kernel died") from None
+                continue
+            if msg["parent_header"].get("msg_id") != msg_id:
+                continue
+            kind, content = msg["msg_type"], msg["content"]
+            if kind == "status" and content["execution_state"] == "idle":
+                break
+            if kind == "stream":
+                if outputs and outputs[-1]["output_type"] == "stream" \
+                        and outputs[-1]["name"] == content["name"]:
+                    outputs[-1]["text"] += content["text"]
+                else:
+                    outputs.append({"output_type": "stream", "name": content["name"],
+                                    "text": content["text"]})
+            elif kind in ("execute_result", "display_data"):
+                outputs.append({"output_type": kind, "data": content.get("data", {})})
+            elif kind == "error":
+                outputs.append({"output_type": "error", "ename": content["ename"],
+                                "evalue": content["evalue"]})
+            elif kind == "clear_output":
+                outputs.clear()
+
+        while True:
+            try:
+                reply = self.client.get_shell_msg(timeout=max(1.0, deadline - time.monotonic()))
+            except queue.Empty:
+                if not self.manager.is_alive():
+                    raise KernelError("kernel died") from None
+                raise KernelError(f"no execute reply after {timeout:.0f}s") from None
+            if reply["parent_header"].get("msg_id") == msg_id:
+                return reply["content"]["status"], outputs
+
+    def prepare(self, notebook: Path, timeout: float) -> bool:
+        """Reset state for ``notebook``; return True if the kernel was reused warm."""
+        warm = self.notebooks_run > 0
+        if warm:
+            try:
+                status, _ = self.execute("%reset", timeout)
+            except KernelError:
+                status = "error"
+            if status != "ok":
+                # Older kernels without %reset, or a wedged one: fall back to a restart.
+                self.restart()
+                warm = False
+        status, outputs = self.execute(f"%cwd {notebook.parent}", timeout)
+        if status != "ok":
+            raise KernelError(f"cannot change directory: {outputs}")
+        self.notebooks_run += 1
+        return warm
+
+    def shutdown(self) -> None:
+        if self.client is not None:
+            self.client.stop_channels()
+        self.manager.shutdown_kernel(now=True)
+
+
+class KernelPool:
+    """A fixed set of WarmKernels handed out to one notebook at a time."""
+
+    def __init__(self, size: int, kernel_name: str, startup_timeout: float) -> None:
+        self._idle: queue.Queue[WarmKernel] = queue.Queue()
+        self.kernels: list[WarmKernel] = []
+        errors: list[BaseException] = []
+        lock = threading.Lock()
+
+        def start() -> None:
+            try:
+                kernel = WarmKernel(kernel_name, startup_timeout)
+            except BaseException as exc:  # noqa: BLE001 - reported below
+                with lock:
+                    errors.append(exc)
+                return
+            with lock:
+                self.kernels.append(kernel)
+            self._idle.put(kernel)
+
+        threads = [threading.Thread(target=start) for _ in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not self.kernels:
+            raise KernelError(f"no kernel could be started: {errors[0] if errors else 'unknown'}")
+
+    def acquire(self) -> WarmKernel:
+        return self._idle.get()
+
+    def release(self, kernel: WarmKernel) -> None:
+        self._idle.put(kernel)
+
+    def shutdown(self) -> None:
+        for kernel in self.kernels:
+            try:
+                kernel.shutdown()
+            except Exception:  # noqa: BLE001 - best effort on exit
+                pass
+
+
+# ── Output comparison ─────────────────────────────────────────────────────────
+
+def _text(value: Any) -> str:
+    if isinstance(value, list):
+        return "".join(value)
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, indent=1)
+
+
+def normalise_outputs(outputs: list[dict[str, Any]], masks: list[re.Pattern[str]]) -> list[str]:
+    """Flatten outputs into comparable, masked lines."""
+    lines: list[str] = []
+    pending_stream: dict[str, str] = {}
+
+    def flush() -> None:
+        for name, text in pending_stream.items():
+            lines.extend(f"[{name}] {ln}" for ln in text.splitlines())
+        pending_stream.clear()
+
+    for out in outputs:
+        kind = out.get("output_type")
+        if kind == "stream":
+            name = out.get("name", "stdout")
+            pending_stream[name] = pending_stream.get(name, "") + _text(out.get("text", ""))
+            continue
+        flush()
+        if kind in ("execute_result", "display_data"):
+            for mime in sorted(out.get("data", {})):
+                body = _text(out["data"][mime])
+                lines.extend(f"[{mime}] {ln}" for ln in body.splitlines())
+        elif kind == "error":
+            lines.append(f"[error] {out.get('ename', '')}: {out.get('evalue', '')}")
+    flush()
+
+    masked = []
+    for line in lines:
+        for mask in masks:
+            line = mask.sub("<masked>", line)
+        masked.append(line.rstrip())
+    return masked
+
+
+# ── Running ───────────────────────────────────────────────────────────────────
+
+def run_notebook(pool: KernelPool, path: Path, args: argparse.Namespace,
+                 masks: list[re.Pattern[str]]) -> dict[str, Any]:
+    notebook = json.loads(path.read_text(encoding="utf-8"))
+    cells = [c for c in notebook.get("cells", []) if c.get("cell_type") == "code"]
+    report: dict[str, Any] = {
+        "notebook": str(path.relative_to(REPO_ROOT) if path.is_relative_to(REPO_ROOT) else path),
+        "cells": [], "errors": 0, "mismatches": 0, "warm": False, "seconds": 0.0,
+        "failure": None,
+    }
+
+    kernel = pool.acquire()
+    started = time.perf_counter()
+    try:
+        report["warm"] = kernel.prepare(path, args.cell_timeout)
+        for index, cell in enumerate(cells):
+            source = _text(cell.get("source", ""))
+            if not source.strip():
+                continue
+            cell_start = time.perf_counter()
+            status, outputs = kernel.execute(source, args.cell_timeout)
+            elapsed = time.perf_counter() - cell_start
+
+            entry: dict[str, Any] = {"index": index, "seconds": round(elapsed, 6),
+                                     "status": status}
+            expected_error = any(o.get("output_type") == "error" for o in cell.get("outputs", []))
+            if status != "ok" and not expected_error:
+                report["errors"] += 1
+            if not args.no_diff:
+                expected = normalise_outputs(cell.get("outputs", []), masks)
+                actual = normalise_outputs(outputs, masks)
+                if expected != actual:
+                    report["mismatches"] += 1
+                    entry["diff"] = list(difflib.unified_diff(
+                        expected, actual, "stored", "executed", lineterm="", n=1))
+            report["cells"].append(entry)
+    except KernelError as exc:
+        report["failure"] = str(exc)
+        try:
+            kernel.restart()
+        except Exception as restart_exc:  # noqa: BLE001 - next prepare() retries
+            report["failure"] += f"; restart failed: {restart_exc}"
+    finally:
+        report["seconds"] = round(time.perf_counter() - started, 6)
+        pool.release(kernel)
+    return report
+
+
+def print_report(reports: list[dict[str, Any]], show_timings: bool) -> None:
+    width = max(len(r["notebook"]) for r in reports)
+    print(f"{'notebook':<{width}}  {'cells':>5}  {'errors':>6}  {'diffs':>5}  {'kernel':>6}  "
+          f"{'seconds':>8}")
+    print("-" * (width + 44))
+    for r in reports:
+        kernel = "warm" if r["warm"] else "cold"
+        print(f"{r['notebook']:<{width}}  {len(r['cells']):>5}  {r['errors']:>6}  "
+              f"{r['mismatches']:>5}  {kernel:>6}  {r['seconds']:>8.2f}")
+
+    for r in reports:
+        if r["failure"]:
+            print(f"\n{r['notebook']}: FAILED: {r['failure']}")
+        for cell in r["cells"]:
+            if "diff" in cell:
+                print(f"\n{r['notebook']} code cell {cell['index']}: output differs")
+                for line in cell["diff"][:DIFF_PRINT_LIMIT]:
+                    print(f"    {line}")
+                if len(cell["diff"]) > DIFF_PRINT_LIMIT:
+                    print(f"    ... {len(cell['diff']) - DIFF_PRINT_LIMIT} more line(s)")
+        if show_timings:
+            print(f"\n{r['notebook']} per-cell timings:")
+            for cell in r["cells"]:
+                print(f"    code cell {cell['index']:>3}  {cell['seconds'] * 1e3:>10.1f} ms  "
+                      f"{cell['status']}")
+
+
+def main() -> int:
+    args = parse_args()
+    try:
+        import jupyter_client  # noqa: F401
+    except ImportError:
+        print("error: jupyter_client is required (pip install jupyter_client)", file=sys.stderr)
+        return 2
+
+    notebooks = [Path(p).resolve() for p in args.notebooks] or default_notebooks()
+    missing = [p for p in notebooks if not p.is_file()]
+    if missing:
+        print(f"error: notebook not found: {missing[0]}", file=sys.stderr)
+        return 1
+    if not notebooks:
+        print(f"error: no notebooks found under {NOTEBOOK_DIR}", file=sys.stderr)
+        return 1
+
+    masks = [re.compile(m) for m in (*DEFAULT_MASKS, *args.mask)]
+    jobs = max(1, min(args.jobs, len(notebooks)))
+
+    started = time.perf_counter()
+    try:
+        pool = KernelPool(jobs, args.kernel, args.startup_timeout)
+    except Exception as exc:  # noqa: BLE001 - surfaced as a CLI error
+        print(f"error: cannot start '{args.kernel}' kernel: {exc}", file=sys.stderr)
+        return 1
+    pool_seconds = time.perf_counter() - started
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(pool.kernels)) as executor:
+            reports = list(executor.map(lambda p: run_notebook(pool, p, args, masks), notebooks))
+    finally:
+        pool.shutdown()
+    total_seconds = time.perf_counter() - started
+
+    print_report(reports, args.timings)
+    print(f"\n{len(reports)} notebook(s) on {len(pool.kernels)} kernel(s): "
+          f"pool start {pool_seconds:.2f}s, total {total_seconds:.2f}s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "pool_start_seconds": round(pool_seconds, 6),
+            "total_seconds": round(total_seconds, 6),
+            "kernels": len(pool.kernels),
+            "kernel_starts": [{"startup_seconds": round(k.startup_seconds, 6),
+                               "restarts": k.restarts,
+                               "restart_seconds": round(k.restart_seconds, 6)}
+                              for k in pool.kernels],
+            "notebooks": reports,
+        }, indent=2) + "\n", encoding="utf-8")
+
+    failed = any(r["failure"] or r["errors"] or r["mismatches"] for r in reports)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())